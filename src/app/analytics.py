@@ -0,0 +1,214 @@
+"""
+Analytics of a user's transactions, for the Analysis tab.
+
+A user's whole history is read with one query into columns (arrays) and aggregated
+column-wise with NumPy. Results are cached under the user's data version.
+"""
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from . import exchange, models, versions
+
+
+class Columns(NamedTuple):
+    """
+    A user's transactions as parallel columns.
+    Months are numbered from year 0 (`year * 12 + month - 1`); amounts are in minor units
+    of the user's currency.
+    """
+
+    months: np.ndarray
+    is_income: np.ndarray
+    amounts: np.ndarray
+    tags: np.ndarray
+
+
+def _convert(
+    amounts: Sequence[int], currencies: Sequence[str], to_currency: str
+) -> np.ndarray:
+    """
+    Converts amounts in minor units of their currencies to minor units of `to_currency`,
+    rounding each one. Each distinct currency's exchange rate is looked up once.
+    """
+    codes, inverse = np.unique(np.array(currencies, dtype=object), return_inverse=True)
+    factors = np.array(
+        [float(exchange.factor(code, to_currency)) for code in codes.tolist()]
+    )
+    return np.rint(np.array(amounts, dtype=np.int64) * factors[inverse]).astype(
+        np.int64
+    )
+
+
+def load_columns(db_user: models.User) -> Columns:
+    """
+    Reads the user's transactions into columns, with one query.
+    Month numbers are computed by the database, and amounts in other currencies are
+    converted to the user's currency with the cached exchange rates.
+    """
+    rows = list(
+        models.Transaction.objects.filter(user=db_user).values_list(
+            ExtractYear("transaction_date") * 12 + ExtractMonth("transaction_date") - 1,
+            "transaction_type",
+            "amount",
+            "currency",
+            "tags",
+        )
+    )
+    months, types, amounts, currencies, tags = (
+        zip(*rows) if rows else ((), (), (), (), ())
+    )
+    if any(currencies):
+        amounts = _convert(amounts, currencies, db_user.currency)
+    return Columns(
+        np.array(months, dtype=np.int64),
+        np.array(types, dtype=object) == models.Transaction.TransactionType.INCOME,
+        np.array(amounts, dtype=np.int64),
+        np.array([tag or "" for tag in tags], dtype=object),
+    )
+
+
+def _month_start(month: int) -> date:
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def _monthly_totals(columns: Columns, first: int, count: int) -> tuple:
+    """
+    Sums income and expenditure per month, for `count` months from month number `first`.
+
+    Returns:
+        (income per month, expenditure per month), as lists of ints.
+    """
+    offsets = columns.months - first
+    income = np.bincount(
+        offsets[columns.is_income],
+        weights=columns.amounts[columns.is_income],
+        minlength=count,
+    )
+    expenditure = np.bincount(
+        offsets[~columns.is_income],
+        weights=columns.amounts[~columns.is_income],
+        minlength=count,
+    )
+    # bincount sums in float64, which is exact for totals below 2**53 minor units
+    return income.round().astype(np.int64).tolist(), (
+        expenditure.round().astype(np.int64).tolist()
+    )
+
+
+def _tag_totals(columns: Columns) -> Dict[str, int]:
+    """
+    Sums expenditure per tag; untagged expenditure is under "".
+    """
+    spent = ~columns.is_income
+    tags, inverse = np.unique(columns.tags[spent], return_inverse=True)
+    sums = np.bincount(inverse, weights=columns.amounts[spent], minlength=len(tags))
+    return dict(zip(tags.tolist(), sums.round().astype(np.int64).tolist()))
+
+
+def _rolling_average(values: List[int], window: int) -> List[Optional[int]]:
+    """
+    The mean of each value and the `window - 1` values before it, rounded to an integer;
+    None for the first `window - 1` values.
+    """
+    if len(values) < window:
+        return [None] * len(values)
+    totals = np.cumsum(np.array(values, dtype=np.int64))
+    sums = totals[window - 1 :] - np.concatenate(([0], totals[:-window]))
+    means = np.rint(sums / window).astype(np.int64).tolist()
+    return [None] * (window - 1) + means
+
+
+def _change(previous: int, current: int) -> Optional[float]:
+    return (current - previous) / previous if previous else None
+
+
+def _savings_rate(income: int, expenditure: int) -> Optional[float]:
+    return (income - expenditure) / income if income else None
+
+
+def compute(columns: Columns, window: int) -> dict:
+    """
+    Computes the analysis of a user's transactions from their columns.
+
+    Returns:
+        Dictionary with 3 keys:
+            tags: List[dict] -> Expenditure per tag (`tag`, `total`, `share` of all
+            expenditure), largest first.
+            months: List[dict] -> For every month from the first to the last with
+            transactions: `month` (its first day), `income`, `expenditure`, their
+            `window`-month rolling averages, the `savings_rate` and the month-over-month
+            `expenditure_change` (a fraction; None where undefined).
+            totals: dict -> `income`, `expenditure` and `savings_rate` over all time.
+        Amounts are in minor units.
+    """
+    if not columns.amounts.size:
+        return {
+            "tags": [],
+            "months": [],
+            "totals": {"income": 0, "expenditure": 0, "savings_rate": None},
+        }
+
+    first, last = int(columns.months.min()), int(columns.months.max())
+    income, expenditure = _monthly_totals(columns, first, last - first + 1)
+    income_average = _rolling_average(income, window)
+    expenditure_average = _rolling_average(expenditure, window)
+
+    months = []
+    for i, (month_income, month_expenditure) in enumerate(zip(income, expenditure)):
+        months.append(
+            {
+                "month": _month_start(first + i),
+                "income": month_income,
+                "expenditure": month_expenditure,
+                "income_average": income_average[i],
+                "expenditure_average": expenditure_average[i],
+                "savings_rate": _savings_rate(month_income, month_expenditure),
+                "expenditure_change": _change(expenditure[i - 1], month_expenditure)
+                if i
+                else None,
+            }
+        )
+
+    total_income, total_expenditure = sum(income), sum(expenditure)
+    tags = sorted(_tag_totals(columns).items(), key=lambda item: (-item[1], item[0]))
+    return {
+        "tags": [
+            {
+                "tag": tag,
+                "total": total,
+                "share": total / total_expenditure if total_expenditure else None,
+            }
+            for tag, total in tags
+        ],
+        "months": months,
+        "totals": {
+            "income": total_income,
+            "expenditure": total_expenditure,
+            "savings_rate": _savings_rate(total_income, total_expenditure),
+        },
+    }
+
+
+def get_analysis(db_user: models.User) -> dict:
+    """
+    Returns `compute`'s analysis of the user's transactions, with the rolling average
+    window of `settings.ANALYTICS_ROLLING_WINDOW` months.
+    Cached in the "fragments" cache under the user's data version and the exchange rates'
+    version, so it is only recomputed after the user's transactions or the rates change.
+    """
+    data_version = versions.current(db_user.pk)
+    key = (
+        f"analytics:{db_user.pk}:{data_version.version}:{exchange.rates_version()}:"
+        f"{settings.ANALYTICS_ROLLING_WINDOW}"
+    )
+    return caches["fragments"].get_or_set(
+        key,
+        lambda: compute(load_columns(db_user), settings.ANALYTICS_ROLLING_WINDOW),
+        settings.FRAGMENT_CACHE_TTL,
+    )
@@ -0,0 +1,128 @@
+"""JSON endpoints for reading a user's transactions."""
+import json
+from typing import Iterator
+
+from django import http
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.views.decorators.http import require_GET
+
+from . import auth, money
+
+
+TRANSACTION_FIELDS = (
+    "id",
+    "transaction_type",
+    "amount",
+    "currency",
+    "transaction_date",
+    "name",
+    "notes",
+    "tags",
+)
+
+
+def _stream_page(rows: Iterator[dict], limit: int, currency: str) -> Iterator[str]:
+    """
+    Serializes up to `limit` transaction rows as a JSON object, one row at a time.
+    Amounts are converted to major units of their transaction's currency (`currency` for
+    transactions in the user's currency) and serialized as decimal strings.
+    `rows` may yield one extra row; if it does, the object's `next_cursor` points past
+    the last serialized row.
+    """
+    yield '{"transactions": ['
+    last = None
+    has_next_page = False
+    for count, row in enumerate(rows):
+        if count == limit:
+            has_next_page = True
+            break
+        if last is not None:
+            yield ", "
+        row["currency"] = row["currency"] or currency
+        row["amount"] = money.from_minor(row["amount"], row["currency"])
+        yield json.dumps(row, cls=DjangoJSONEncoder)
+        last = row
+
+    next_cursor = None
+    if has_next_page:
+        next_cursor = auth.encode_cursor(last["transaction_date"], last["id"])
+    yield f'], "next_cursor": {json.dumps(next_cursor)}}}'
+
+
+@require_GET
+@auth.authenticated()
+def transactions(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
+    """
+    Lists the user's transactions, oldest first.
+
+    Query parameters (all optional):
+        start, end -> ISO 8601 dates; includes transactions on or after `start` and before `end`.
+        type -> "income" or "expenditure".
+        tag -> Only include transactions with this tag.
+        after -> The `next_cursor` of the previous page.
+        limit -> The page size; at most `settings.API_MAX_PAGE_SIZE`.
+
+    The response is streamed, so large pages don't have to be built in memory.
+    """
+    try:
+        limit = int(request.GET.get("limit", settings.API_PAGE_SIZE))
+        if not 0 < limit <= settings.API_MAX_PAGE_SIZE:
+            raise ValueError("limit out of range")
+        transaction_type = request.GET.get("type")
+        queryset = user.filter_transactions(
+            start=auth.parse_date(request.GET.get("start")),
+            end=auth.parse_date(request.GET.get("end")),
+            transaction_type=transaction_type and transaction_type.lower(),
+            tag=request.GET.get("tag"),
+            after=request.GET.get("after"),
+        )
+    except ValueError:
+        return http.JsonResponse({"error": "Invalid query parameters."}, status=400)
+
+    # fetch one extra row to find out whether there is a next page
+    rows = queryset.values(*TRANSACTION_FIELDS)[: limit + 1].iterator(
+        chunk_size=settings.API_ITERATOR_CHUNK_SIZE
+    )
+    return http.StreamingHttpResponse(
+        _stream_page(rows, limit, user.currency), content_type="application/json"
+    )
+
+
+@require_GET
+@auth.authenticated()
+def summary(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
+    """
+    Returns the user's total income, total expenditure and their difference for a period.
+    Amounts are decimal strings in major units of the user's currency; transactions in
+    other currencies are converted at the stored exchange rates.
+
+    Query parameters (all optional):
+        period -> "YYYY", "YYYY-MM" or "YYYY-MM-DD..YYYY-MM-DD" (see `auth.parse_period`);
+        defaults to the current month.
+        month -> "YYYY-MM"; same as `period`, for a single month.
+    """
+    try:
+        if "period" in request.GET:
+            period = auth.parse_period(request.GET["period"])
+        elif "month" in request.GET:
+            period = auth.Period.month(*auth.parse_month(request.GET["month"]))
+        else:
+            period = auth.Period.current_month()
+    except ValueError:
+        return http.JsonResponse({"error": "Invalid period."}, status=400)
+
+    summary = {
+        key: None if value is None else money.from_minor(value, user.currency)
+        for key, value in user.get_dashboard_summary(period).items()
+    }
+    return http.JsonResponse(
+        {
+            "period": str(period),
+            "start": period.start,
+            "end": period.end,
+            "currency": user.currency,
+            **summary,
+        },
+        encoder=DjangoJSONEncoder,
+    )
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class AppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app"
+
+    def ready(self) -> None:
+        from .instrumentation import install_query_timer
+
+        connection_created.connect(
+            install_query_timer, dispatch_uid="app.instrumentation.query_timer"
+        )
+        if settings.DB_CONN_HEALTH_CHECKS:
+            from .db import close_unusable_connections
+
+            request_started.connect(
+                close_unusable_connections, dispatch_uid="app.db.health_checks"
+            )
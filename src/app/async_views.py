@@ -0,0 +1,119 @@
+"""
+Async versions of the views, for serving Pothos over ASGI (see `pothos.asgi`).
+
+Firebase calls run on a bounded thread pool (`auth.run_backend_call`) and database work
+goes through `sync_to_async`, so one process can keep many slow identity calls in flight
+at once. Enable them with `settings.ASYNC_VIEWS`.
+"""
+from functools import wraps
+from typing import Any, Callable
+
+from asgiref.sync import sync_to_async
+from django import http
+from django.shortcuts import redirect
+
+from . import auth, forms, views
+
+
+def _require_http_methods(*methods: str) -> Callable:
+    """
+    Async counterpart of `django.views.decorators.http.require_http_methods`,
+    which can't wrap coroutines in this version of Django.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(
+            request: http.HttpRequest, *args: Any, **kwargs: Any
+        ) -> http.HttpResponse:
+            if request.method not in methods:
+                return http.HttpResponseNotAllowed(methods)
+            return await func(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+require_GET = _require_http_methods("GET", "HEAD")
+require_POST = _require_http_methods("POST")
+
+
+@require_POST
+async def login(request: http.HttpRequest) -> http.HttpResponse:
+    """
+    Route to validate user logins.
+    """
+    form = forms.LoginForm(request.POST)
+    if form.is_valid():
+        email = form.cleaned_data["email"]
+        password = form.cleaned_data["password"]
+        await auth.login_async(request, email, password)
+        return redirect("dashboard")
+    else:
+        return http.HttpResponseServerError(
+            "Something went wrong, form did not validate."
+        )
+
+
+@require_POST
+async def signup(request: http.HttpRequest) -> http.HttpResponse:
+    """
+    Route to sign a new user up to Pothos.
+    """
+    form = forms.SignupForm(request.POST)
+    if form.is_valid():
+        username = form.cleaned_data["username"]
+        email = form.cleaned_data["email"]
+        password = form.cleaned_data["password"]
+        currency = form.cleaned_data["currency"]
+
+        await auth.User.create_async(
+            username=username, email=email, password=password, currency=currency
+        )
+        await auth.login_async(request, email, password)
+        return redirect("dashboard")
+    else:
+        return http.HttpResponseServerError(
+            "Something went wrong; the form did not validate."
+        )
+
+
+@require_GET
+@auth.authenticated()
+async def dashboard(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
+    """
+    Route to render the dashboard for a user.
+    """
+    return await sync_to_async(views.render_dashboard)(request, user)
+
+
+@require_POST
+@auth.authenticated()
+async def create_transaction(
+    request: http.HttpRequest, user: auth.User
+) -> http.HttpResponse:
+    """
+    Creates a new transaction for the user.
+    """
+    return await sync_to_async(views.save_new_transaction)(request, user)
+
+
+@auth.authenticated()
+async def delete_transaction(
+    request: http.HttpRequest, user: auth.User
+) -> http.HttpResponse:
+    """
+    Deletes a transaction with the given transaction ID.
+    """
+    return await sync_to_async(views.remove_transaction)(request, user)
+
+
+@require_GET
+@auth.authenticated()
+async def logout(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
+    """
+    Route to log a user out and redirect them to the main page.
+    """
+    await auth.logout_async(request)
+    return redirect("index")
@@ -0,0 +1,125 @@
+"""
+Authentication backends.
+
+`app.auth` never talks to an identity provider directly; it goes through the backend
+named by `settings.AUTH_BACKEND`, which implements `AuthBackend`.
+"""
+import threading
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Profile(NamedTuple):
+    """
+    A user's details, as the authentication backend knows them.
+    """
+
+    uid: str
+    username: str
+    email: str
+
+
+class BackendError(Exception):
+    """
+    Exception raised when an authentication backend can't be reached.
+    """
+
+    pass
+
+
+class AuthBackend:
+    """
+    The interface of authentication backends.
+
+    A backend checks passwords (`authenticate`), turns the credential that gives back
+    into a session token (`create_session`), and later verifies or revokes that token.
+    Session tokens are strings stored in the user's Django session.
+    """
+
+    # whether the backend's calls query our database; async views make those calls
+    # with `sync_to_async`, so the connections they use are managed per request
+    uses_database = False
+
+    def create_user(self, *, username: str, email: str, password: str) -> Profile:
+        """
+        Registers a new user with the backend.
+
+        Raises:
+            ValueError, if any of the values is invalid.
+            RuntimeError, if the backend refused to create the user.
+        """
+        raise NotImplementedError
+
+    def authenticate(self, email: str, password: str) -> Optional[str]:
+        """
+        Checks a user's email and password.
+
+        Returns:
+            A short-lived credential to pass to `create_session`, or None if the email
+            or password is wrong.
+
+        Raises:
+            BackendError, if the backend can't be reached.
+        """
+        raise NotImplementedError
+
+    def create_session(self, credential: str, expires_in: timedelta) -> Optional[str]:
+        """
+        Exchanges a credential made by `authenticate` for a session token.
+
+        Returns:
+            The session token, or None if the credential was not accepted.
+        """
+        raise NotImplementedError
+
+    def verify_session(self, session_token: str) -> Optional[dict]:
+        """
+        Verifies a session token.
+
+        Returns:
+            The token's claims if it is valid and not revoked, else None.
+            The claims include the user's ID (`uid`) and when the token expires
+            (`exp`, a Unix timestamp).
+        """
+        raise NotImplementedError
+
+    def revoke(self, session_token: str) -> bool:
+        """
+        Revokes a session token, so it no longer verifies.
+
+        Returns:
+            False if the token was invalid to begin with, else True.
+        """
+        raise NotImplementedError
+
+    def get_profile(self, uid: str) -> Profile:
+        """
+        Fetches a user's current details from the backend.
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        """
+        Returns this process's statistics about the backend's connections, for the
+        request timing log; empty if the backend has none.
+        """
+        return {}
+
+
+_backend: Optional[AuthBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> AuthBackend:
+    """
+    Returns the backend named by `settings.AUTH_BACKEND`, creating it on first use.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(settings.AUTH_BACKEND)()
+    return _backend
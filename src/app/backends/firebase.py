@@ -0,0 +1,207 @@
+"""Authentication backed by Firebase (the Admin SDK and the identity toolkit REST API)."""
+import json
+import os
+import threading
+from datetime import timedelta
+from typing import Optional
+
+import firebase_admin
+import requests
+from decouple import config
+from django.conf import settings
+from firebase_admin import auth, credentials, exceptions
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import AuthBackend, BackendError, Profile
+
+
+API_URL = "https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword"
+API_KEY = config("FIREBASE_API_KEY")
+
+# the Firebase app and the identity toolkit HTTP session are created on first use,
+# and again in every forked child (their connections can't be shared across processes)
+_app: Optional[firebase_admin.App] = None
+_identity_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    global _app, _identity_session, _lock
+    _app = None
+    _identity_session = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_app() -> firebase_admin.App:
+    """
+    Returns this process's Firebase app, initializing it with the service account
+    credentials at `settings.FIREBASE_CREDENTIALS` on first use.
+    """
+    global _app
+    if _app is None:
+        with _lock:
+            if _app is None:
+                cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS)
+                # apps are named after the process, since a forked child inherits
+                # its parent's registered apps but must not use them
+                _app = firebase_admin.initialize_app(cred, name=f"pothos-{os.getpid()}")
+    return _app
+
+
+def _create_identity_session() -> requests.Session:
+    """
+    Creates the pooled HTTP session used for calls to the identity toolkit API.
+    Connections are kept alive between requests and failed calls are retried with
+    exponential backoff.
+    """
+    retries = Retry(
+        total=settings.IDENTITY_API_RETRIES,
+        backoff_factor=settings.IDENTITY_API_RETRY_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.IDENTITY_API_POOL_SIZE,
+        max_retries=retries,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
+
+def get_identity_session() -> requests.Session:
+    """
+    Returns this process's identity toolkit HTTP session, creating it on first use.
+    """
+    global _identity_session
+    if _identity_session is None:
+        with _lock:
+            if _identity_session is None:
+                _identity_session = _create_identity_session()
+    return _identity_session
+
+
+def identity_client_stats() -> dict:
+    """
+    Returns connection reuse statistics for this process's identity toolkit HTTP client.
+    All zeros until the client is first used.
+
+    Returns:
+        Dictionary with 3 keys:
+            connections: int -> Number of TCP/TLS connections opened so far.
+            requests: int -> Number of requests sent over those connections.
+            reused: int -> Number of requests that were sent over an already open connection.
+    """
+    connections = requests_sent = 0
+    if _identity_session is None:
+        return {"connections": 0, "requests": 0, "reused": 0}
+    pools = _identity_session.get_adapter(API_URL).poolmanager.pools
+    for key in pools.keys():
+        pool = pools[key]
+        connections += pool.num_connections
+        requests_sent += pool.num_requests
+    return {
+        "connections": connections,
+        "requests": requests_sent,
+        "reused": max(requests_sent - connections, 0),
+    }
+
+
+def sign_in_with_password(email: str, password: str) -> Optional[dict]:
+    """
+    Signs a user in with the identity toolkit API.
+
+    Returns:
+        None, if the user failed authentication
+        Raw response dictionary from the API if the user passed authentication.
+
+    Raises:
+        BackendError, if the API could not be reached or answered with an error
+        (after retrying).
+    """
+    payload = json.dumps(
+        {"email": email, "password": password, "returnSecureToken": True}
+    )
+    try:
+        response = get_identity_session().post(
+            API_URL,
+            params={"key": API_KEY},
+            data=payload,
+            timeout=(
+                settings.IDENTITY_API_CONNECT_TIMEOUT,
+                settings.IDENTITY_API_READ_TIMEOUT,
+            ),
+        )
+        if response.status_code == 400:
+            # wrong emails and passwords are reported as bad requests
+            return None
+        response.raise_for_status()
+        data = response.json()
+    except (requests.RequestException, ValueError) as e:
+        raise BackendError("The identity service could not be reached") from e
+
+    if not data.get("idToken"):
+        # the API didn't give back a regenerate token, so the authentication was a failure
+        return None
+    return data
+
+
+class FirebaseBackend(AuthBackend):
+    """
+    Users live on Firebase; session tokens are Firebase session cookies,
+    and every verification is a call to Firebase.
+    Revoking a session revokes all of the user's sessions.
+    """
+
+    def create_user(self, *, username: str, email: str, password: str) -> Profile:
+        try:
+            user = auth.create_user(
+                app=get_app(), display_name=username, email=email, password=password
+            )
+        except ValueError as e:
+            raise ValueError("Invalid values provided") from e
+        except exceptions.FirebaseError as e:
+            raise RuntimeError(
+                f"Firebase raised an error while creating user {username}"
+            ) from e
+        return Profile(user.uid, user.display_name, user.email)
+
+    def authenticate(self, email: str, password: str) -> Optional[str]:
+        data = sign_in_with_password(email, password)
+        return data["idToken"] if data else None
+
+    def create_session(self, credential: str, expires_in: timedelta) -> Optional[str]:
+        try:
+            return auth.create_session_cookie(
+                id_token=credential, expires_in=expires_in, app=get_app()
+            )
+        except exceptions.FirebaseError:
+            return None
+
+    def verify_session(self, session_token: str) -> Optional[dict]:
+        try:
+            return auth.verify_session_cookie(
+                session_token, check_revoked=True, app=get_app()
+            )
+        except auth.InvalidSessionCookieError:
+            return None
+
+    def revoke(self, session_token: str) -> bool:
+        claims = self.verify_session(session_token)
+        if claims is None:
+            return False
+        auth.revoke_refresh_tokens(claims["sub"], app=get_app())
+        return True
+
+    def get_profile(self, uid: str) -> Profile:
+        user = auth.get_user(uid, app=get_app())
+        return Profile(user.uid, user.display_name, user.email)
+
+    def stats(self) -> dict:
+        return {"identity_client": identity_client_stats()}
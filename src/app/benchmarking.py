@@ -0,0 +1,298 @@
+"""
+Helpers to load-test Pothos without Firebase.
+
+`fake_firebase` swaps every call made by the Firebase auth backend for an in-process fake,
+`seed` fills the database with synthetic users and transactions, and `run_scenario`
+drives a view at a given concurrency and measures latency and queries per request.
+The `benchmark` management command ties them together.
+"""
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+from unittest import mock
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from firebase_admin import auth as firebase_auth
+
+from . import models, rollups
+
+
+PASSWORD = "benchmark-password"
+TAGS = ["Rent", "Food/Groceries", "Material Goods", "Investment", "Entertainment"]
+
+
+class FakeFirebase:
+    """
+    An in-process stand-in for the parts of the Firebase Admin SDK and the identity
+    toolkit API that `app.backends.firebase` uses.
+
+    Arguments:
+        latency -> Seconds every call sleeps for, to simulate network round trips.
+    """
+
+    InvalidSessionCookieError = firebase_auth.InvalidSessionCookieError
+    RevokedSessionCookieError = firebase_auth.RevokedSessionCookieError
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+        self._users: Dict[str, SimpleNamespace] = {}
+        self._tokens: Dict[str, str] = {}
+        self._sessions: Dict[str, dict] = {}
+        self._revoked_before: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def add_user(self, uid: str, username: str, email: str) -> SimpleNamespace:
+        """
+        Registers a user without counting it as a call.
+        """
+        user = SimpleNamespace(uid=uid, display_name=username, email=email)
+        with self._lock:
+            self._users[uid] = user
+        return user
+
+    def create_user(self, app=None, **kwargs) -> SimpleNamespace:
+        self._call("create_user")
+        return self.add_user(uuid.uuid4().hex, kwargs["display_name"], kwargs["email"])
+
+    def get_user(self, uid: str, app=None) -> SimpleNamespace:
+        self._call("get_user")
+        return self._users[uid]
+
+    def sign_in_with_password(self, email: str, password: str) -> Optional[dict]:
+        """
+        Replaces `app.backends.firebase.sign_in_with_password` (the identity toolkit call).
+        """
+        self._call("sign_in_with_password")
+        for user in self._users.values():
+            if user.email == email and password == PASSWORD:
+                token = uuid.uuid4().hex
+                with self._lock:
+                    self._tokens[token] = user.uid
+                return {"idToken": token, "localId": user.uid}
+        return None
+
+    def create_session_cookie(
+        self, id_token: str, expires_in: timedelta, app=None
+    ) -> str:
+        self._call("create_session_cookie")
+        uid = self._tokens[id_token]
+        cookie = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._sessions[cookie] = {
+                "uid": uid,
+                "sub": uid,
+                "iat": now,
+                "exp": now + expires_in.total_seconds(),
+            }
+        return cookie
+
+    def verify_session_cookie(
+        self, session_cookie: str, check_revoked: bool = False, app=None
+    ) -> dict:
+        self._call("verify_session_cookie")
+        claims = self._sessions.get(session_cookie)
+        if claims is None or claims["exp"] < time.time():
+            raise self.InvalidSessionCookieError("Invalid session cookie")
+        if check_revoked and claims["iat"] <= self._revoked_before.get(
+            claims["uid"], 0
+        ):
+            raise self.RevokedSessionCookieError("Session cookie revoked")
+        return dict(claims)
+
+    def revoke_refresh_tokens(self, uid: str, app=None) -> None:
+        self._call("revoke_refresh_tokens")
+        with self._lock:
+            self._revoked_before[uid] = time.time()
+
+
+@contextmanager
+def fake_firebase(latency: float = 0.0) -> Iterator[FakeFirebase]:
+    """
+    Makes `app.auth` use the Firebase backend, with every Firebase call it makes
+    replaced by a `FakeFirebase`, while active.
+    The Firebase app is never initialized, so no credentials are needed.
+    """
+    fake = FakeFirebase(latency)
+    from . import auth, backends
+    from .backends import firebase
+
+    with mock.patch.object(firebase, "auth", fake), mock.patch.object(
+        firebase, "get_app"
+    ), mock.patch.object(
+        firebase, "sign_in_with_password", fake.sign_in_with_password
+    ), mock.patch.object(
+        backends, "_backend", firebase.FirebaseBackend()
+    ):
+        auth._session_claims_cache.clear()
+        auth._db_user_cache.clear()
+        yield fake
+
+
+def seed(
+    fake: FakeFirebase,
+    users: int,
+    transactions_per_user: int,
+    years: int = 5,
+    batch_size: int = 1000,
+    rng: Optional[random.Random] = None,
+) -> List[models.User]:
+    """
+    Creates (or tops up) synthetic users so each has `transactions_per_user` transactions,
+    spread over the last `years` years, with `bulk_create`.
+    The users are registered with `fake` so they can log in.
+    """
+    rng = rng or random.Random(0)
+    today = date.today()
+    db_users = []
+    for i in range(users):
+        db_user, _ = models.User.objects.get_or_create(
+            id=f"bench-{i}",
+            defaults={
+                "username": f"bench{i}",
+                "email": f"bench{i}@example.com",
+                "currency": "USD",
+            },
+        )
+        fake.add_user(db_user.id, db_user.username, db_user.email)
+        db_users.append(db_user)
+
+        missing = transactions_per_user - db_user.transaction_set.count()
+        batch = []
+        for _ in range(max(missing, 0)):
+            is_income = rng.random() < 0.3
+            batch.append(
+                models.Transaction(
+                    user=db_user,
+                    transaction_type="income" if is_income else "expenditure",
+                    amount=rng.randint(100, 500_000),
+                    transaction_date=today - timedelta(days=rng.randrange(365 * years)),
+                    name="Salary" if is_income else f"Purchase {rng.randrange(1000)}",
+                    notes="",
+                    tags="" if is_income else rng.choice(TAGS),
+                )
+            )
+        models.Transaction.objects.bulk_create(batch, batch_size=batch_size)
+    rollups.rebuild()
+    return db_users
+
+
+class ScenarioResult(NamedTuple):
+    """
+    Latency (in milliseconds) and database query statistics of one scenario run.
+    """
+
+    scenario: str
+    volume: int
+    concurrency: int
+    requests: int
+    errors: int
+    throughput: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    queries_per_request: float
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Returns the `q`-th percentile (0-100) of `values`, by linear interpolation.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def logged_in_client(db_user: models.User) -> Client:
+    """
+    Returns a test client logged in as the user, through the regular login view.
+    """
+    client = Client(raise_request_exception=False)
+    response = client.post(
+        "/user/login", {"email": db_user.email, "password": PASSWORD}
+    )
+    if response.status_code != 302:
+        raise RuntimeError(f"Could not log in as {db_user}: {response.status_code}")
+    return client
+
+
+Request = Callable[[Client, int], object]
+
+
+def run_scenario(
+    name: str,
+    clients: List[Client],
+    request: Request,
+    requests_per_client: int,
+    volume: int,
+) -> ScenarioResult:
+    """
+    Sends `requests_per_client` requests from every client, all clients concurrently.
+
+    Arguments:
+        name -> The scenario's name, for reporting.
+        clients -> Logged in clients; one thread is used per client.
+        request -> Called as `request(client, n)` to send the client's n-th request.
+        requests_per_client
+        volume -> The number of transactions per user, for reporting.
+    """
+    latencies: List[float] = []
+    queries: List[int] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(client: Client) -> None:
+        nonlocal errors
+        try:
+            for n in range(requests_per_client):
+                with CaptureQueriesContext(connection) as context:
+                    start = time.perf_counter()
+                    response = request(client, n)
+                    elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    latencies.append(elapsed)
+                    queries.append(len(context.captured_queries))
+                    if response.status_code >= 400:
+                        errors += 1
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(clients)) as executor:
+        list(executor.map(worker, clients))
+    duration = time.perf_counter() - start
+
+    return ScenarioResult(
+        scenario=name,
+        volume=volume,
+        concurrency=len(clients),
+        requests=len(latencies),
+        errors=errors,
+        throughput=len(latencies) / duration if duration else 0.0,
+        p50_ms=percentile(latencies, 50),
+        p90_ms=percentile(latencies, 90),
+        p99_ms=percentile(latencies, 99),
+        max_ms=max(latencies, default=0.0),
+        queries_per_request=statistics.mean(queries) if queries else 0.0,
+    )
@@ -0,0 +1,18 @@
+"""Database connection helpers."""
+from django.db import connections
+
+
+def close_unusable_connections(**kwargs) -> None:
+    """
+    Closes persistent database connections that no longer work (e.g. after the server
+    restarted or a proxy dropped them), so the request opens a new one instead of failing.
+    Connected to `request_started` when `settings.DB_CONN_HEALTH_CHECKS` is on.
+    """
+    for conn in connections.all():
+        if (
+            conn.connection is not None
+            and conn.settings_dict["CONN_MAX_AGE"] != 0
+            and not conn.in_atomic_block
+            and not conn.is_usable()
+        ):
+            conn.close()
@@ -0,0 +1,180 @@
+"""
+Exchange rates, for users with transactions in more than one currency.
+
+The rates are stored in `models.ExchangeRate`, loaded from a JSON file with `load`
+(the `load_exchange_rates` command), so conversions never need the network.
+Every process keeps the whole table in memory for `settings.EXCHANGE_RATES_CACHE_TTL`
+seconds, so converting costs no queries on the request path. Other processes only see
+newly loaded rates once their copy expires, so anything cached from converted amounts
+is keyed by `rates_version` as well as the user's data version.
+"""
+import hashlib
+import json
+from decimal import Decimal
+from typing import Dict, Iterable, Set, TextIO, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from . import models, money, versions
+from .cache import TTLCache
+
+
+_rates_cache = TTLCache(maxsize=1, ttl=settings.EXCHANGE_RATES_CACHE_TTL)
+
+
+class UnknownCurrency(ValueError):
+    """
+    Exception raised when converting from or to a currency without an exchange rate.
+    """
+
+    pass
+
+
+def parse(f: TextIO) -> Dict[str, Decimal]:
+    """
+    Parses an exchange rate file: a JSON object like `{"base": "EUR", "rates": {"USD": 1.08}}`,
+    giving how many units of each currency one unit of the base currency buys.
+
+    Raises:
+        ValueError, if the file isn't in that format or a rate isn't a positive number.
+    """
+    data = json.load(f, parse_float=Decimal, parse_int=Decimal)
+    if not isinstance(data, dict) or not isinstance(data.get("rates"), dict):
+        raise ValueError('Expected a JSON object with a "rates" object')
+    rates = {
+        str(currency).upper(): Decimal(rate) for currency, rate in data["rates"].items()
+    }
+    if data.get("base"):
+        rates[str(data["base"]).upper()] = Decimal(1)
+    for currency, rate in rates.items():
+        if len(currency) != 3 or not rate.is_finite() or rate <= 0:
+            raise ValueError(f"Invalid exchange rate {rate} for {currency!r}")
+    return rates
+
+
+def _currencies_in_use() -> Set[str]:
+    """
+    Returns the currencies that amounts are converted from or to: those of transactions
+    and recurring transactions in another currency than their user's, and those of
+    their users.
+    """
+    used = set()
+    for model in (models.Transaction, models.RecurringTransaction):
+        foreign = model.objects.exclude(currency="")
+        used.update(foreign.order_by().values_list("currency", flat=True).distinct())
+        used.update(
+            models.User.objects.filter(pk__in=foreign.values("user"))
+            .order_by()
+            .values_list("currency", flat=True)
+            .distinct()
+        )
+    return {currency.upper() for currency in used}
+
+
+def load(rates: Dict[str, Decimal]) -> int:
+    """
+    Replaces the stored exchange rates.
+    Every user's data version is bumped, since their converted totals may change.
+
+    Returns:
+        The number of rates stored.
+
+    Raises:
+        ValueError, if a currency that stored amounts are converted from or to has no
+        rate in `rates`.
+    """
+    with transaction.atomic():
+        missing = _currencies_in_use().difference(rates)
+        if missing:
+            raise ValueError(
+                f"No exchange rate for {', '.join(sorted(missing))}, which is in use"
+            )
+        models.ExchangeRate.objects.all().delete()
+        models.ExchangeRate.objects.bulk_create(
+            models.ExchangeRate(currency=currency, rate=rate)
+            for currency, rate in rates.items()
+        )
+        versions.bump_all()
+    _rates_cache.clear()
+    return len(rates)
+
+
+def _cached_rates() -> Tuple[Dict[str, Decimal], str]:
+    """
+    Returns the stored exchange rates by currency and their version, from the in-memory
+    cache when possible.
+    """
+    cached = _rates_cache.get("rates")
+    if cached is None:
+        rates = dict(models.ExchangeRate.objects.values_list("currency", "rate"))
+        digest = hashlib.sha1(
+            ",".join(
+                f"{currency}={rate}" for currency, rate in sorted(rates.items())
+            ).encode()
+        )
+        cached = (rates, digest.hexdigest()[:12])
+        _rates_cache.set("rates", cached)
+    return cached
+
+
+def get_rates() -> Dict[str, Decimal]:
+    """
+    Returns the stored exchange rates by currency, from the in-memory cache when possible.
+    """
+    return _cached_rates()[0]
+
+
+def rates_version() -> str:
+    """
+    Returns a short hash of the exchange rates this process converts with,
+    which changes whenever they do.
+    """
+    return _cached_rates()[1]
+
+
+def is_supported(currency: str) -> bool:
+    """
+    Returns whether amounts in the currency can be converted.
+    """
+    return currency.upper() in get_rates()
+
+
+def factor(from_currency: str, to_currency: str) -> Decimal:
+    """
+    Returns the number that converts an amount in minor units of `from_currency`
+    to minor units of `to_currency`, when multiplied with it.
+    A blank `from_currency` means `to_currency`.
+
+    Raises:
+        UnknownCurrency, if either currency has no exchange rate.
+    """
+    from_currency, to_currency = from_currency.upper(), to_currency.upper()
+    if not from_currency or from_currency == to_currency:
+        return Decimal(1)
+    rates = get_rates()
+    for currency in (from_currency, to_currency):
+        if currency not in rates:
+            raise UnknownCurrency(f"No exchange rate for {currency!r}")
+    return (rates[to_currency] / rates[from_currency]).scaleb(
+        money.exponent(to_currency) - money.exponent(from_currency)
+    )
+
+
+def convert_totals(totals: Iterable[Tuple[str, int]], to_currency: str) -> int:
+    """
+    Converts and adds up totals that are each in one currency.
+
+    Arguments:
+        totals -> (currency, total in minor units of it) pairs; a blank currency means
+        `to_currency`.
+        to_currency
+
+    Returns:
+        The sum, in minor units of `to_currency`, rounded once at the end.
+    """
+    exact = sum(
+        (amount * factor(currency, to_currency) for currency, amount in totals),
+        Decimal(0),
+    )
+    return int(exact.to_integral_value())
@@ -0,0 +1,68 @@
+"""Functions to export a user's transactions as CSV."""
+import csv
+import zlib
+from typing import Iterable, Iterator, Sequence
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+
+from . import money
+
+
+# the header matches what `imports.parse_csv` expects, so exports can be imported again
+HEADER = ("title", "amount", "currency", "type", "date", "spending_type", "notes")
+EXPORT_FIELDS = (
+    "name",
+    "amount",
+    "currency",
+    "transaction_type",
+    "transaction_date",
+    "tags",
+    "notes",
+)
+
+
+class _Echo:
+    """
+    A file-like object that returns what is written to it, so `csv.writer`
+    can format rows one at a time without buffering them.
+    """
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(transactions: QuerySet, currency: str) -> Iterator[str]:
+    """
+    Formats transactions as CSV lines, with amounts in major units of their currency;
+    `currency` is the user's, for transactions without one.
+    Rows are fetched from the database in chunks of `settings.EXPORT_CHUNK_SIZE`,
+    so memory use doesn't grow with the number of rows.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADER)
+    rows: Iterable[Sequence] = transactions.values_list(*EXPORT_FIELDS).iterator(
+        chunk_size=settings.EXPORT_CHUNK_SIZE
+    )
+    for name, amount, transaction_currency, *rest in rows:
+        transaction_currency = transaction_currency or currency
+        yield writer.writerow(
+            (
+                name,
+                money.from_minor(amount, transaction_currency),
+                transaction_currency,
+                *rest,
+            )
+        )
+
+
+def gzip_stream(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    Gzip-compresses a stream of text on the fly.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # 16 -> gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode())
+        if compressed:
+            yield compressed
+    yield compressor.flush()
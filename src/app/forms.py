@@ -1,5 +1,9 @@
+from typing import Any, Dict, Optional
+
 from django import forms
 
+from . import exchange, models, money
+
 
 class LoginForm(forms.Form):
     email = forms.EmailField(max_length=50)
@@ -14,13 +18,142 @@ class SignupForm(forms.Form):
 
 
 class TransactionForm(forms.Form):
-    title = forms.CharField(max_length=35)
-    amount = forms.FloatField()
+    """
+    Form for a transaction's details.
+    The amount is entered in major units of the transaction's currency (`currency` if
+    none is given) and cleaned to minor units. The transaction's currency is cleaned to
+    "" when it is `currency`, and must otherwise have an exchange rate.
+    """
+
+    title = forms.CharField(max_length=30)
+    # before the amount, which is cleaned according to it
+    currency = forms.CharField(min_length=3, max_length=3, required=False)
+    amount = forms.DecimalField()
     type = forms.CharField(max_length=11)
     date = forms.DateField()
     spending_type = forms.CharField(max_length=14, required=False)
     notes = forms.CharField(max_length=300, required=False)
 
+    def __init__(self, *args: Any, currency: str, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.currency = currency
+
+    def clean_currency(self) -> str:
+        value = self.cleaned_data["currency"].upper()
+        if not value or value == self.currency.upper():
+            return ""
+        if not (exchange.is_supported(value) and exchange.is_supported(self.currency)):
+            raise forms.ValidationError(f"No exchange rate for {value}")
+        return value
+
+    def clean_amount(self) -> int:
+        currency = self.cleaned_data.get("currency") or self.currency
+        try:
+            amount = money.to_minor(self.cleaned_data["amount"], currency)
+        except ValueError:
+            raise forms.ValidationError(
+                f"Amounts in {currency} can have at most "
+                f"{money.exponent(currency)} decimal places"
+            )
+        if abs(amount) > money.MAX_MINOR:
+            raise forms.ValidationError("This amount is too large.")
+        return amount
+
+    def clean_type(self) -> str:
+        value = self.cleaned_data["type"].lower()
+        if value not in models.Transaction.TransactionType.values:
+            raise forms.ValidationError(f"Unknown transaction type {value!r}")
+        return value
+
 
 class UpdateTransactionForm(TransactionForm):
-    id = forms.CharField(max_length=100)
+    """
+    Form for a partial update of a transaction: only `id` is required,
+    and only the submitted fields are changed, except that submitting an amount without
+    a currency also changes the transaction's currency to the user's.
+    A currency can only be changed together with the amount.
+    """
+
+    # transaction form fields -> Transaction model fields
+    MODEL_FIELDS = {
+        "title": "name",
+        "currency": "currency",
+        "amount": "amount",
+        "type": "transaction_type",
+        "date": "transaction_date",
+        "spending_type": "tags",
+        "notes": "notes",
+    }
+
+    id = forms.IntegerField()
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            field.required = name == "id"
+
+    def clean_amount(self) -> Optional[int]:
+        if self.cleaned_data["amount"] is None:
+            return None
+        return super().clean_amount()
+
+    def clean_type(self) -> str:
+        if not self.cleaned_data["type"]:
+            return ""
+        return super().clean_type()
+
+    def clean(self) -> dict:
+        cleaned_data = super().clean()
+        # fields that weren't submitted are left out, so they aren't changed
+        for name in self.MODEL_FIELDS:
+            if name not in self.data:
+                cleaned_data.pop(name, None)
+        # an amount is always read in the currency submitted with it, so an amount
+        # on its own is in the user's currency
+        if "amount" in cleaned_data and "currency" not in self.data:
+            cleaned_data["currency"] = ""
+        # and a currency on its own would reinterpret the stored minor units
+        if "currency" in self.data and "amount" not in self.data:
+            self.add_error(
+                "currency", "The amount must be submitted with the currency."
+            )
+        for name in ("title", "amount", "type", "date"):
+            if name in cleaned_data and cleaned_data[name] in (None, ""):
+                self.add_error(name, "This field can't be empty.")
+        return cleaned_data
+
+    def changed_fields(self) -> Dict[str, Any]:
+        """
+        The submitted changes, by Transaction model field. Only valid after `is_valid`.
+        """
+        return {
+            self.MODEL_FIELDS[name]: value
+            for name, value in self.cleaned_data.items()
+            if name in self.MODEL_FIELDS
+        }
+
+
+class RecurringTransactionForm(TransactionForm):
+    """
+    Form for a recurring transaction rule: a transaction's details, with `date` as the
+    first occurrence, and how often it repeats.
+    """
+
+    interval = forms.ChoiceField(choices=models.RecurringTransaction.Interval.choices)
+    interval_count = forms.IntegerField(min_value=1, max_value=1000, required=False)
+    end_date = forms.DateField(required=False)
+
+    def clean_interval_count(self) -> int:
+        return self.cleaned_data["interval_count"] or 1
+
+    def clean(self) -> dict:
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("date"), cleaned_data.get("end_date")
+        if start and end and end < start:
+            self.add_error("end_date", "The end date can't be before the start date.")
+        return cleaned_data
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=[("csv", "CSV"), ("ofx", "OFX")], required=False)
@@ -0,0 +1,211 @@
+"""Functions to bulk import transactions from CSV and OFX files."""
+import csv
+import re
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import forms, models, rollups, versions
+
+
+FORMATS = ("csv", "ofx")
+
+# OFX files are SGML (v1) or XML (v2); both put one element per tag,
+# closing tags are optional in v1.
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+class RowError(NamedTuple):
+    """
+    A row of an imported file that could not be imported.
+    `row` is the line number for CSV files, and the transaction's position for OFX files.
+    """
+
+    row: int
+    errors: Dict[str, List[str]]
+
+
+class ImportResult(NamedTuple):
+    """
+    The outcome of an import.
+    """
+
+    created: int
+    errors: List[RowError]
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Tuple[int, dict]]:
+    """
+    Parses a CSV file into `forms.TransactionForm` data, one row at a time.
+    The first line must be a header naming the form's fields
+    (title, amount, type, date, and optionally currency, spending_type and notes).
+
+    Yields:
+        (line number, form data) pairs.
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, {
+            key.strip().lower(): (value or "").strip()
+            for key, value in row.items()
+            if key is not None
+        }
+
+
+def _ofx_date(value: str) -> str:
+    """
+    Converts an OFX date ("YYYYMMDD" followed by an optional time) to an ISO 8601 date.
+    """
+    return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+
+
+def _ofx_form_data(fields: Dict[str, str]) -> dict:
+    """
+    Converts the fields of an OFX <STMTTRN> element to `forms.TransactionForm` data.
+    Credits (positive amounts) become income and debits become expenditure.
+    """
+    amount = fields.get("TRNAMT", "")
+    is_debit = amount.startswith("-")
+    return {
+        "title": fields.get("NAME") or fields.get("MEMO", ""),
+        "amount": amount.lstrip("+-"),
+        "type": "expenditure" if is_debit else "income",
+        "date": _ofx_date(fields.get("DTPOSTED", "")),
+        "spending_type": "",
+        "notes": fields.get("MEMO", ""),
+    }
+
+
+def parse_ofx(lines: Iterable[str]) -> Iterator[Tuple[int, dict]]:
+    """
+    Parses the statement transactions of an OFX file into `forms.TransactionForm` data,
+    one transaction at a time.
+
+    Yields:
+        (transaction number, form data) pairs; transactions are numbered from 1.
+    """
+    fields: Optional[Dict[str, str]] = None
+    count = 0
+    for line in lines:
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if closing and fields is not None:
+                    count += 1
+                    yield count, _ofx_form_data(fields)
+                    fields = None
+                elif not closing:
+                    fields = {}
+            elif fields is not None and not closing:
+                fields[tag] = value.strip()
+
+
+def parse(lines: Iterable[str], format: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Parses a file in the given format ("csv" or "ofx") into `forms.TransactionForm` data.
+    """
+    if format == "csv":
+        return parse_csv(lines)
+    elif format == "ofx":
+        return parse_ofx(lines)
+    raise ValueError(f"Unsupported import format {format!r}")
+
+
+def guess_format(filename: str) -> Optional[str]:
+    """
+    Guesses the format of a file from its extension.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower()
+    return extension if extension in FORMATS else None
+
+
+def _build_transaction(
+    db_user: models.User, data: dict
+) -> Tuple[Optional[models.Transaction], Dict[str, List[str]]]:
+    """
+    Validates one row of form data and builds an unsaved transaction from it.
+
+    Returns:
+        (transaction, {}) if the row is valid, else (None, errors by field).
+    """
+    form = forms.TransactionForm(data, currency=db_user.currency)
+    if not form.is_valid():
+        return None, {field: list(messages) for field, messages in form.errors.items()}
+
+    tr = models.Transaction(
+        user=db_user,
+        transaction_type=form.cleaned_data["type"],
+        amount=form.cleaned_data["amount"],
+        currency=form.cleaned_data["currency"],
+        transaction_date=form.cleaned_data["date"],
+        name=form.cleaned_data["title"],
+        notes=form.cleaned_data["notes"],
+        tags=form.cleaned_data["spending_type"],
+    )
+    try:
+        # catches values the form accepts but the columns don't;
+        # notes and tags are optional and already length-checked by the form
+        tr.clean_fields(exclude=["user", "notes", "tags"])
+    except ValidationError as e:
+        return None, e.message_dict
+    return tr, {}
+
+
+def _save_batch(db_user: models.User, batch: List[models.Transaction]) -> None:
+    """
+    Inserts a batch of transactions and adds them to the user's monthly totals,
+    with one rollup update per month and type.
+    """
+    models.Transaction.objects.bulk_create(batch)
+    rollups.adjust_many(
+        db_user,
+        (
+            (tr.transaction_type, tr.transaction_date, tr.currency, tr.amount, 1)
+            for tr in batch
+        ),
+    )
+
+
+def import_transactions(
+    db_user: models.User,
+    rows: Iterable[Tuple[int, dict]],
+    batch_size: Optional[int] = None,
+) -> ImportResult:
+    """
+    Validates and saves parsed rows (see `parse`) as transactions of the user.
+
+    Valid rows are inserted with `bulk_create`, `batch_size` at a time, all inside a single
+    database transaction. Invalid rows are skipped and reported; they don't stop the import.
+
+    Arguments:
+        db_user
+        rows -> (row number, form data) pairs.
+        batch_size -> Defaults to `settings.IMPORT_BATCH_SIZE`.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    created = 0
+    errors: List[RowError] = []
+
+    rows = iter(rows)
+    with transaction.atomic():
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            batch = []
+            for row, data in chunk:
+                tr, row_errors = _build_transaction(db_user, data)
+                if tr is None:
+                    errors.append(RowError(row, row_errors))
+                else:
+                    batch.append(tr)
+            if batch:
+                _save_batch(db_user, batch)
+                created += len(batch)
+        if created:
+            versions.bump(db_user)
+
+    return ImportResult(created, errors)
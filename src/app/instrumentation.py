@@ -0,0 +1,164 @@
+"""Per-request timing of auth backend calls, database queries and template rendering."""
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from django import http
+from django.conf import settings
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.utils.deprecation import MiddlewareMixin
+
+from .backends import get_backend
+
+
+logger = logging.getLogger(__name__)
+
+# descriptions of the phases shown in the Server-Timing header
+PHASES = {
+    "auth": "Auth backend",
+    "user": "User lookup",
+    "db": "Database",
+    "render": "Template rendering",
+}
+
+
+class RequestTimings:
+    """
+    The time spent in each phase of one request, in seconds, and the number of
+    database queries it made.
+    Phases can overlap: queries made while looking up the user or rendering also count
+    towards "db".
+    """
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def add(self, phase: str, duration: float) -> None:
+        self.durations[phase] += duration
+        self.counts[phase] += 1
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """
+    Adds the time spent in the block to `phase` of the current request.
+    Does nothing when the request isn't being instrumented.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def _time_query(
+    execute: Callable, sql: str, params: Any, many: bool, context: dict
+) -> Any:
+    """
+    Database execute wrapper that adds every query's time to the "db" phase.
+    """
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    with timed("db"):
+        return execute(sql, params, many, context)
+
+
+def install_query_timer(connection: BaseDatabaseWrapper, **kwargs: Any) -> None:
+    """
+    `connection_created` receiver that wraps every query made on the connection with
+    `_time_query`. Connections are per thread, so this catches the queries of async
+    views too, which run in `sync_to_async` threads.
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class ServerTimingMiddleware(MiddlewareMixin):
+    """
+    Times the phases of a sample of requests (`settings.SERVER_TIMING_SAMPLE_RATE`).
+    The timings are sent back in a `Server-Timing` header and logged as a JSON line,
+    along with the auth backend's connection statistics (`AuthBackend.stats`).
+    Works in both sync and async middleware stacks.
+    """
+
+    def __call__(self, request: http.HttpRequest) -> http.HttpResponse:
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request: http.HttpRequest) -> http.HttpResponse:
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._report(request, response, timings, time.perf_counter() - start)
+
+    def _report(
+        self,
+        request: http.HttpRequest,
+        response: http.HttpResponse,
+        timings: RequestTimings,
+        total: float,
+    ) -> http.HttpResponse:
+        """
+        Adds the `Server-Timing` header to the response and logs the timings.
+        """
+        response["Server-Timing"] = ", ".join(
+            [
+                f'{phase};dur={timings.durations[phase] * 1000:.1f};desc="{description}"'
+                for phase, description in PHASES.items()
+                if phase in timings.durations
+            ]
+            + [f'total;dur={total * 1000:.1f};desc="Total"']
+        )
+        logger.info(
+            json.dumps(
+                {
+                    "event": "request_timings",
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "total_ms": round(total * 1000, 3),
+                    "db_queries": timings.counts.get("db", 0),
+                    "auth_calls": timings.counts.get("auth", 0),
+                    **{
+                        f"{phase}_ms": round(duration * 1000, 3)
+                        for phase, duration in timings.durations.items()
+                    },
+                    "auth_backend": get_backend().stats(),
+                }
+            )
+        )
+        return response
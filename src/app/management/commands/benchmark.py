@@ -0,0 +1,207 @@
+import json
+import tempfile
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from app import benchmarking, models, rollups
+
+
+SCENARIOS = ("dashboard", "create_transaction", "delete_transaction")
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",")]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the dashboard and transaction views against a throwaway database "
+        "and an in-process fake of Firebase, at growing data volumes. Reports latency "
+        "percentiles and queries per request, saves them as JSON, and optionally "
+        "compares them with a previous run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument(
+            "--volumes",
+            type=_int_list,
+            default=[100, 1000, 10000],
+            help="Comma separated numbers of transactions per user to test at.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=8, help="Number of concurrent clients."
+        )
+        parser.add_argument(
+            "--requests", type=int, default=50, help="Requests per client per scenario."
+        )
+        parser.add_argument(
+            "--scenarios",
+            type=lambda value: value.split(","),
+            default=list(SCENARIOS),
+            help=f"Comma separated scenarios to run, out of {', '.join(SCENARIOS)}.",
+        )
+        parser.add_argument(
+            "--firebase-latency-ms",
+            type=float,
+            default=0.0,
+            help="Simulated round trip time of every Firebase call.",
+        )
+        parser.add_argument(
+            "--output",
+            default="benchmark-results.json",
+            help="File to save the results to.",
+        )
+        parser.add_argument(
+            "--baseline", help="Results of a previous run to compare against."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Relative p90 latency increase over the baseline counted as a regression.",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["scenarios"]) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        setup_test_environment()
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == "sqlite":
+                # a file, so that concurrent clients share one database
+                connection.settings_dict["TEST"]["NAME"] = str(
+                    Path(directory) / "benchmark.sqlite3"
+                )
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                with benchmarking.fake_firebase(
+                    options["firebase_latency_ms"] / 1000
+                ) as fake:
+                    results = self._run(fake, options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        Path(options["output"]).write_text(
+            json.dumps(
+                {
+                    "created": datetime.now(timezone.utc).isoformat(),
+                    "options": {
+                        key: options[key]
+                        for key in (
+                            "users",
+                            "volumes",
+                            "concurrency",
+                            "requests",
+                            "firebase_latency_ms",
+                        )
+                    },
+                    "results": [result._asdict() for result in results],
+                },
+                indent=2,
+            )
+        )
+        self.stdout.write(f"Saved results to {options['output']}")
+
+        if options["baseline"]:
+            self._compare(results, options["baseline"], options["threshold"])
+
+    def _run(self, fake, options):
+        results = []
+        for volume in sorted(options["volumes"]):
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{options['users']} users x {volume} transactions"
+                )
+            )
+            db_users = benchmarking.seed(fake, options["users"], volume)
+            clients = [
+                benchmarking.logged_in_client(db_users[i % len(db_users)])
+                for i in range(options["concurrency"])
+            ]
+            for scenario in options["scenarios"]:
+                request = getattr(self, f"_{scenario}_request")(
+                    clients, db_users, options["requests"]
+                )
+                result = benchmarking.run_scenario(
+                    scenario, clients, request, options["requests"], volume
+                )
+                results.append(result)
+                self.stdout.write(
+                    f"  {scenario:<20} p50 {result.p50_ms:7.1f}ms  "
+                    f"p90 {result.p90_ms:7.1f}ms  p99 {result.p99_ms:7.1f}ms  "
+                    f"{result.queries_per_request:5.1f} queries/request  "
+                    f"{result.throughput:7.1f} requests/s  {result.errors} errors"
+                )
+            # bring every user back to exactly `volume` transactions for the next round
+            models.Transaction.objects.filter(name="Benchmark").delete()
+            rollups.rebuild()
+        return results
+
+    def _dashboard_request(self, clients, db_users, requests):
+        return lambda client, n: client.get("/dashboard")
+
+    def _create_transaction_request(self, clients, db_users, requests):
+        today = date.today().isoformat()
+        data = {
+            "title": "Benchmark",
+            "amount": "12.34",
+            "type": "expenditure",
+            "date": today,
+            "spending_type": "Food/Groceries",
+        }
+        return lambda client, n: client.post("/transaction/new", data)
+
+    def _delete_transaction_request(self, clients, db_users, requests):
+        # every client deletes transactions of its own user, made up front
+        ids = {}
+        for i, client in enumerate(clients):
+            db_user = db_users[i % len(db_users)]
+            ids[id(client)] = [
+                models.Transaction.objects.create(
+                    user=db_user,
+                    transaction_type="expenditure",
+                    amount=1234,
+                    transaction_date=date.today(),
+                    name="Benchmark",
+                    notes="",
+                    tags="",
+                ).id
+                for _ in range(requests)
+            ]
+        rollups.rebuild()
+        return lambda client, n: client.post(
+            "/transaction/delete", {"id": ids[id(client)][n]}
+        )
+
+    def _compare(self, results, baseline_path, threshold):
+        baseline = {
+            (r["scenario"], r["volume"], r["concurrency"]): r
+            for r in json.loads(Path(baseline_path).read_text())["results"]
+        }
+        regressions = 0
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Compared with {baseline_path}"))
+        for result in results:
+            before = baseline.get((result.scenario, result.volume, result.concurrency))
+            if before is None:
+                continue
+            change = result.p90_ms / before["p90_ms"] - 1 if before["p90_ms"] else 0.0
+            regressed = (
+                change > threshold
+                or result.queries_per_request > before["queries_per_request"]
+            )
+            regressions += regressed
+            line = (
+                f"  {result.scenario:<20} {result.volume:>7}  p90 {change:+7.1%}  "
+                f"queries/request {before['queries_per_request']:.1f} -> "
+                f"{result.queries_per_request:.1f}"
+            )
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+        if regressions:
+            raise CommandError(f"{regressions} scenarios regressed")
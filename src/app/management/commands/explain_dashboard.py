@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from app import auth, models
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the dashboard's queries for a user and prints their query plans. "
+        "Use it to check that the queries are served by indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("uid", help="ID of the user to explain the queries for.")
+
+    def handle(self, *args, **options):
+        try:
+            user = auth.User.retrieve(options["uid"])
+        except models.User.DoesNotExist:
+            raise CommandError(f"User {options['uid']} does not exist")
+
+        with CaptureQueriesContext(connection) as context:
+            months = user.get_active_months()
+            period = auth.Period.month(*months[-1]) if months else None
+            if period is not None:
+                user.get_income_transactions(period)
+                user.get_expenditure_transactions(period)
+            user.get_dashboard_summary(period)
+
+        prefix = connection.ops.explain_query_prefix()
+        for query in context.captured_queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(query["sql"]))
+            with connection.cursor() as cursor:
+                cursor.execute(f"{prefix} {query['sql']}")
+                for row in cursor.fetchall():
+                    self.stdout.write("  " + " ".join(str(col) for col in row))
+            self.stdout.write("")
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app import imports, models
+
+
+class Command(BaseCommand):
+    help = "Imports a user's transactions from a CSV or OFX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "uid", help="ID of the user to import the transactions for."
+        )
+        parser.add_argument("path", help="Path to the CSV or OFX file.")
+        parser.add_argument(
+            "--format",
+            choices=imports.FORMATS,
+            help="Format of the file. Guessed from its extension if omitted.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of rows inserted at a time. Defaults to settings.IMPORT_BATCH_SIZE.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            db_user = models.User.objects.get(pk=options["uid"])
+        except models.User.DoesNotExist:
+            raise CommandError(f"User {options['uid']} does not exist")
+
+        format = options["format"] or imports.guess_format(options["path"])
+        if format is None:
+            raise CommandError("Could not guess the file format; pass --format")
+
+        with open(options["path"], encoding="utf-8-sig", newline="") as f:
+            result = imports.import_transactions(
+                db_user, imports.parse(f, format), options["batch_size"]
+            )
+
+        for error in result.errors:
+            messages = "; ".join(
+                f"{field}: {' '.join(field_errors)}"
+                for field, field_errors in error.errors.items()
+            )
+            self.stderr.write(f"Row {error.row}: {messages}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.created} transactions, skipped {len(result.errors)} rows"
+            )
+        )
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app import exchange
+
+
+class Command(BaseCommand):
+    help = (
+        "Replaces the stored exchange rates with the ones in a JSON file like "
+        '{"base": "EUR", "rates": {"USD": 1.08, "JPY": 161.5}}.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=settings.EXCHANGE_RATES_FILE,
+            help="Path to the exchange rate file. Defaults to settings.EXCHANGE_RATES_FILE.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], encoding="utf-8") as f:
+                rates = exchange.parse(f)
+        except OSError as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+        except ValueError as e:
+            raise CommandError(f"Invalid exchange rate file: {e}")
+
+        try:
+            loaded = exchange.load(rates)
+        except ValueError as e:
+            raise CommandError(f"Could not load the exchange rates: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} exchange rates"))
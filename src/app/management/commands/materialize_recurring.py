@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app import recurring
+
+
+class Command(BaseCommand):
+    help = (
+        "Saves the due occurrences of every user's recurring transactions as "
+        "transactions. Safe to rerun; meant to be run daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--until",
+            help="ISO 8601 date to save occurrences up to (inclusive). Defaults to today.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Number of rules processed per database transaction. "
+            "Defaults to settings.RECURRING_BATCH_SIZE.",
+        )
+
+    def handle(self, *args, **options):
+        until = None
+        if options["until"]:
+            try:
+                until = date.fromisoformat(options["until"])
+            except ValueError:
+                raise CommandError(f"Invalid date {options['until']!r}")
+
+        result = recurring.materialize(until, options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {result.created} transactions from {result.rules} recurring rules"
+            )
+        )
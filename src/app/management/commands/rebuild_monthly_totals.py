@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app import models, rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds (or verifies) the stored monthly totals from the raw transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="ID of a single user to process. Processes all users if omitted.",
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report monthly totals that don't match the raw transactions.",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = models.User.objects.get(pk=options["user"])
+            except models.User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+
+        if options["verify"]:
+            mismatched = rollups.verify(user)
+            for user_id, year, month, transaction_type, currency in mismatched:
+                self.stdout.write(
+                    f"Mismatch: user {user_id}, {year}-{month:02}, {transaction_type}"
+                    f"{', ' + currency if currency else ''}"
+                )
+            if mismatched:
+                raise CommandError(f"{len(mismatched)} monthly totals are out of date")
+            self.stdout.write(self.style.SUCCESS("All monthly totals are up to date"))
+        else:
+            written = rollups.rebuild(user)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} monthly totals"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app import auth, models
+
+
+class Command(BaseCommand):
+    help = (
+        "Pulls users' display names and emails from the auth backend into the database. "
+        "Run it after profiles are changed on the backend (e.g. in the Firebase console)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="ID of a single user to refresh. Refreshes all users if omitted.",
+        )
+
+    def handle(self, *args, **options):
+        if options["user"]:
+            if not models.User.objects.filter(pk=options["user"]).exists():
+                raise CommandError(f"User {options['user']} does not exist")
+            uids = [options["user"]]
+        else:
+            uids = models.User.objects.values_list("pk", flat=True).iterator()
+
+        refreshed = failed = 0
+        for uid in uids:
+            try:
+                auth.User.retrieve(uid).refresh_profile()
+            except Exception as e:
+                # one missing or unreachable profile shouldn't stop the others
+                self.stderr.write(f"Could not refresh user {uid}: {e}")
+                failed += 1
+            else:
+                refreshed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} profiles"))
+        if failed:
+            raise CommandError(f"{failed} profiles could not be refreshed")
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:12
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def lowercase_transaction_types(apps, schema_editor):
+    Transaction = apps.get_model("app", "Transaction")
+    Transaction.objects.update(transaction_type=Lower("transaction_type"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0010_alter_transaction_transaction_date"),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_transaction_types, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "transaction_type", "transaction_date"],
+                name="transaction_user_type_date_idx",
+            ),
+        ),
+    ]
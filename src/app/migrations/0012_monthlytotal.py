@@ -0,0 +1,69 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_monthly_totals(apps, schema_editor):
+    Transaction = apps.get_model("app", "Transaction")
+    MonthlyTotal = apps.get_model("app", "MonthlyTotal")
+    rows = (
+        Transaction.objects.annotate(
+            year=ExtractYear("transaction_date"), month=ExtractMonth("transaction_date")
+        )
+        .values("user_id", "year", "month", "transaction_type")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    MonthlyTotal.objects.bulk_create(MonthlyTotal(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0011_transaction_user_type_date_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyTotal",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField()),
+                ("month", models.PositiveSmallIntegerField()),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[("income", "Income"), ("expenditure", "Expenditure")],
+                        max_length=11,
+                    ),
+                ),
+                ("total", models.FloatField(default=0)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="app.user"
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="monthlytotal",
+            constraint=models.UniqueConstraint(
+                fields=("user", "year", "month", "transaction_type"),
+                name="monthlytotal_unique_period",
+            ),
+        ),
+        migrations.RunPython(populate_monthly_totals, migrations.RunPython.noop),
+    ]
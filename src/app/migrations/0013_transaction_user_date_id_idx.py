@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:56
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0012_monthlytotal"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="transaction_date",
+            field=models.DateField(default=datetime.date.today),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["user", "transaction_date", "id"],
+                name="transaction_user_date_id_idx",
+            ),
+        ),
+    ]
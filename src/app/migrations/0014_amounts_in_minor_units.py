@@ -0,0 +1,140 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:40
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+# copied from app.money, so this migration doesn't change if that module does
+CURRENCY_EXPONENTS = {
+    "BHD": 3,
+    "IQD": 3,
+    "JOD": 3,
+    "KWD": 3,
+    "LYD": 3,
+    "OMR": 3,
+    "TND": 3,
+    "BIF": 0,
+    "CLP": 0,
+    "DJF": 0,
+    "GNF": 0,
+    "ISK": 0,
+    "JPY": 0,
+    "KMF": 0,
+    "KRW": 0,
+    "PYG": 0,
+    "RWF": 0,
+    "UGX": 0,
+    "VND": 0,
+    "VUV": 0,
+    "XAF": 0,
+    "XOF": 0,
+    "XPF": 0,
+}
+BATCH_SIZE = 1000
+
+
+def _exponent(currency):
+    return CURRENCY_EXPONENTS.get(currency.upper(), 2)
+
+
+def _convert_amounts(apps, forwards):
+    User = apps.get_model("app", "User")
+    Transaction = apps.get_model("app", "Transaction")
+    MonthlyTotal = apps.get_model("app", "MonthlyTotal")
+
+    for user in User.objects.all():
+        exponent = _exponent(user.currency)
+        batch = []
+        for tr in Transaction.objects.filter(user=user).iterator():
+            if forwards:
+                # repr() gives the shortest decimal that round-trips the stored float
+                tr.amount_minor = int(
+                    Decimal(repr(tr.amount)).scaleb(exponent).to_integral_value()
+                )
+            else:
+                tr.amount = float(Decimal(tr.amount_minor).scaleb(-exponent))
+            batch.append(tr)
+            if len(batch) == BATCH_SIZE:
+                Transaction.objects.bulk_update(batch, ["amount", "amount_minor"])
+                batch = []
+        Transaction.objects.bulk_update(batch, ["amount", "amount_minor"])
+
+        # totals are recomputed rather than converted, so they are exact sums
+        for total in MonthlyTotal.objects.filter(user=user):
+            transactions = Transaction.objects.filter(
+                user=user,
+                transaction_type=total.transaction_type,
+                transaction_date__year=total.year,
+                transaction_date__month=total.month,
+            )
+            if forwards:
+                total.total_minor = (
+                    transactions.aggregate(sum=Sum("amount_minor"))["sum"] or 0
+                )
+            else:
+                total.total = transactions.aggregate(sum=Sum("amount"))["sum"] or 0
+            total.save()
+
+
+def amounts_to_minor_units(apps, schema_editor):
+    _convert_amounts(apps, forwards=True)
+
+
+def amounts_to_major_units(apps, schema_editor):
+    _convert_amounts(apps, forwards=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0013_transaction_user_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="amount_minor",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="monthlytotal",
+            name="total_minor",
+            field=models.BigIntegerField(default=0),
+        ),
+        # defaults let the float columns be re-added when migrating backwards
+        migrations.AlterField(
+            model_name="transaction",
+            name="amount",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="monthlytotal",
+            name="total",
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(amounts_to_minor_units, amounts_to_major_units),
+        migrations.RemoveField(
+            model_name="transaction",
+            name="amount",
+        ),
+        migrations.RemoveField(
+            model_name="monthlytotal",
+            name="total",
+        ),
+        migrations.RenameField(
+            model_name="transaction",
+            old_name="amount_minor",
+            new_name="amount",
+        ),
+        migrations.RenameField(
+            model_name="monthlytotal",
+            old_name="total_minor",
+            new_name="total",
+        ),
+        migrations.AlterField(
+            model_name="transaction",
+            name="amount",
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0014_amounts_in_minor_units"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LocalAccount",
+            fields=[
+                (
+                    "uid",
+                    models.CharField(max_length=32, primary_key=True, serialize=False),
+                ),
+                ("username", models.CharField(max_length=30)),
+                ("email", models.TextField(unique=True)),
+                ("password", models.CharField(max_length=128)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RevokedSession",
+            fields=[
+                (
+                    "token_id",
+                    models.CharField(max_length=32, primary_key=True, serialize=False),
+                ),
+                ("expires_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
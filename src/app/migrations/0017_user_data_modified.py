@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0016_user_data_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="data_modified",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0017_user_data_modified"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecurringTransaction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[("income", "Income"), ("expenditure", "Expenditure")],
+                        max_length=11,
+                    ),
+                ),
+                ("amount", models.BigIntegerField()),
+                ("name", models.CharField(max_length=30)),
+                ("notes", models.TextField(null=True)),
+                ("tags", models.CharField(max_length=14, null=True)),
+                (
+                    "interval",
+                    models.CharField(
+                        choices=[
+                            ("daily", "Daily"),
+                            ("weekly", "Weekly"),
+                            ("monthly", "Monthly"),
+                            ("yearly", "Yearly"),
+                        ],
+                        max_length=7,
+                    ),
+                ),
+                ("interval_count", models.PositiveSmallIntegerField(default=1)),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField(null=True)),
+                ("next_date", models.DateField(db_index=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="app.user"
+                    ),
+                ),
+            ],
+        ),
+    ]
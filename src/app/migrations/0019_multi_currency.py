@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0018_recurringtransaction"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExchangeRate",
+            fields=[
+                (
+                    "currency",
+                    models.CharField(max_length=3, primary_key=True, serialize=False),
+                ),
+                ("rate", models.DecimalField(decimal_places=10, max_digits=24)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name="monthlytotal",
+            name="monthlytotal_unique_period",
+        ),
+        migrations.AddField(
+            model_name="monthlytotal",
+            name="currency",
+            field=models.CharField(blank=True, default="", max_length=3),
+        ),
+        migrations.AddField(
+            model_name="recurringtransaction",
+            name="currency",
+            field=models.CharField(blank=True, default="", max_length=3),
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="currency",
+            field=models.CharField(blank=True, default="", max_length=3),
+        ),
+        migrations.AddConstraint(
+            model_name="monthlytotal",
+            constraint=models.UniqueConstraint(
+                fields=("user", "year", "month", "transaction_type", "currency"),
+                name="monthlytotal_unique_period",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0019_multi_currency"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="data_modified",
+        ),
+    ]
@@ -1,3 +1,5 @@
+from datetime import date
+
 from django.db import models
 
 
@@ -10,6 +12,8 @@ class User(models.Model):
     username = models.CharField(max_length=30, null=False)
     email = models.TextField(unique=True)
     currency = models.CharField(max_length=3, null=False)
+    # incremented on every change to the user's transactions, see app.versions
+    data_version = models.PositiveBigIntegerField(default=0)
 
     def __str__(self) -> str:
         return f"<Pothos User {self.id} {self.username}>"
@@ -30,16 +34,154 @@ class Transaction(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     transaction_type = models.CharField(max_length=11, choices=TransactionType.choices)
-    amount = models.FloatField()
-    transaction_date = models.DateField(
-        auto_now=True
-    )  # this default is not actually used anywhere.
+    # in minor units of the transaction's currency, see app.money
+    amount = models.BigIntegerField()
+    # ISO 4217 code of the amount's currency; blank means the user's currency
+    currency = models.CharField(max_length=3, blank=True, default="")
+    transaction_date = models.DateField(default=date.today)
     name = models.CharField(max_length=30)
     notes = models.TextField(null=True)
     tags = models.CharField(null=True, max_length=14)
 
+    class Meta:
+        indexes = [
+            # every dashboard query filters by user, type and date
+            models.Index(
+                fields=["user", "transaction_type", "transaction_date"],
+                name="transaction_user_type_date_idx",
+            ),
+            # keyset pagination walks a user's transactions in (date, id) order
+            models.Index(
+                fields=["user", "transaction_date", "id"],
+                name="transaction_user_date_id_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs) -> None:
+        # types are always stored lowercase, so lookups can use exact matches
+        self.transaction_type = self.transaction_type.lower()
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return (
             f"<Transaction {self.transaction_date} by {self.user} - {self.amount} "
             f"at {self.transaction_date}>"
         )
+
+
+class MonthlyTotal(models.Model):
+    """
+    Database model holding the sum of a user's transactions of one type and currency
+    in one month.
+    Kept up to date by `app.rollups` whenever a transaction is created, updated or deleted.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    transaction_type = models.CharField(
+        max_length=11, choices=Transaction.TransactionType.choices
+    )
+    currency = models.CharField(max_length=3, blank=True, default="")
+    # in minor units of `currency`, like Transaction.amount
+    total = models.BigIntegerField(default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "year", "month", "transaction_type", "currency"],
+                name="monthlytotal_unique_period",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f"<MonthlyTotal {self.year}-{self.month:02} {self.transaction_type} "
+            f"by {self.user} - {self.total} {self.currency}>"
+        )
+
+
+class LocalAccount(models.Model):
+    """
+    Database model holding the credentials of a user of the local auth backend
+    (`app.backends.local`).
+    """
+
+    uid = models.CharField(max_length=32, primary_key=True)
+    username = models.CharField(max_length=30)
+    email = models.TextField(unique=True)
+    password = models.CharField(max_length=128)  # a Django password hash
+
+    def __str__(self) -> str:
+        return f"<LocalAccount {self.uid} {self.email}>"
+
+
+class RevokedSession(models.Model):
+    """
+    Database model listing the session tokens revoked by the local auth backend,
+    until they would have expired anyway.
+    """
+
+    token_id = models.CharField(max_length=32, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"<RevokedSession {self.token_id} until {self.expires_at}>"
+
+
+class RecurringTransaction(models.Model):
+    """
+    Database model representing a rule that repeats a transaction every `interval_count`
+    days, weeks, months or years from `start_date`, until `end_date` if set.
+    Occurrences are saved as regular transactions by `app.recurring`.
+    """
+
+    class Interval(models.TextChoices):
+        """
+        Enumeration representing the units a rule can repeat in.
+        """
+
+        DAILY = "daily"
+        WEEKLY = "weekly"
+        MONTHLY = "monthly"
+        YEARLY = "yearly"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    transaction_type = models.CharField(
+        max_length=11, choices=Transaction.TransactionType.choices
+    )
+    amount = models.BigIntegerField()  # in minor units, like Transaction.amount
+    currency = models.CharField(max_length=3, blank=True, default="")
+    name = models.CharField(max_length=30)
+    notes = models.TextField(null=True)
+    tags = models.CharField(null=True, max_length=14)
+    interval = models.CharField(max_length=7, choices=Interval.choices)
+    interval_count = models.PositiveSmallIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True)
+    # the date of the first occurrence that hasn't been saved as a transaction yet
+    next_date = models.DateField(db_index=True)
+
+    def save(self, *args, **kwargs) -> None:
+        self.transaction_type = self.transaction_type.lower()
+        super().save(*args, **kwargs)
+
+    def __str__(self) -> str:
+        return (
+            f"<RecurringTransaction {self.name} by {self.user} - {self.amount} "
+            f"every {self.interval_count} {self.interval} from {self.start_date}>"
+        )
+
+
+class ExchangeRate(models.Model):
+    """
+    Database model holding how many units of a currency one unit of the exchange rate
+    table's base currency buys. Loaded from a file by `app.exchange.load`.
+    """
+
+    currency = models.CharField(max_length=3, primary_key=True)
+    rate = models.DecimalField(max_digits=24, decimal_places=10)
+
+    def __str__(self) -> str:
+        return f"<ExchangeRate {self.currency} {self.rate}>"
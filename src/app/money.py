@@ -0,0 +1,65 @@
+"""Functions to convert amounts of money between major units and integer minor units."""
+from decimal import Decimal, InvalidOperation
+from typing import Union
+
+
+# ISO 4217 currencies whose minor unit isn't a hundredth of the major unit
+CURRENCY_EXPONENTS = {
+    "BHD": 3,
+    "IQD": 3,
+    "JOD": 3,
+    "KWD": 3,
+    "LYD": 3,
+    "OMR": 3,
+    "TND": 3,
+    "BIF": 0,
+    "CLP": 0,
+    "DJF": 0,
+    "GNF": 0,
+    "ISK": 0,
+    "JPY": 0,
+    "KMF": 0,
+    "KRW": 0,
+    "PYG": 0,
+    "RWF": 0,
+    "UGX": 0,
+    "VND": 0,
+    "VUV": 0,
+    "XAF": 0,
+    "XOF": 0,
+    "XPF": 0,
+}
+DEFAULT_EXPONENT = 2
+# the largest amount, in minor units, that fits the BigIntegerField columns
+MAX_MINOR = 2**63 - 1
+
+
+def exponent(currency: str) -> int:
+    """
+    Returns the number of decimal places of a currency's minor unit (2 for cents).
+    """
+    return CURRENCY_EXPONENTS.get(currency.upper(), DEFAULT_EXPONENT)
+
+
+def to_minor(amount: Union[Decimal, int, str], currency: str) -> int:
+    """
+    Converts an amount in major units (e.g. "12.34" dollars) to minor units (1234 cents).
+
+    Raises:
+        ValueError, if the amount isn't a number or has more decimal places than
+        the currency's minor unit.
+    """
+    try:
+        scaled = Decimal(str(amount)).scaleb(exponent(currency))
+    except InvalidOperation as e:
+        raise ValueError(f"{amount!r} is not a valid amount") from e
+    if not scaled.is_finite() or scaled != scaled.to_integral_value():
+        raise ValueError(f"{amount!r} can't be represented in {currency}")
+    return int(scaled)
+
+
+def from_minor(amount: int, currency: str) -> Decimal:
+    """
+    Converts an amount in minor units (1234 cents) to major units (Decimal("12.34") dollars).
+    """
+    return Decimal(amount).scaleb(-exponent(currency))
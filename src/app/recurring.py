@@ -0,0 +1,158 @@
+"""
+Functions to save the occurrences of recurring transaction rules
+(`models.RecurringTransaction`) as regular transactions.
+
+Every rule's `next_date` is its watermark: the occurrences before it have been saved.
+`materialize` saves the due occurrences and moves the watermarks forward in the same
+database transaction, so it can be run any number of times, or be interrupted and
+rerun, without saving an occurrence twice. It is meant to run outside of requests,
+from the `materialize_recurring` management command.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from . import models, rollups, versions
+
+
+class MaterializeResult(NamedTuple):
+    """
+    The outcome of a `materialize` run.
+    """
+
+    rules: int
+    created: int
+
+
+def _months_per_step(rule: models.RecurringTransaction) -> int:
+    if rule.interval == models.RecurringTransaction.Interval.YEARLY:
+        return rule.interval_count * 12
+    return rule.interval_count
+
+
+def occurrence(rule: models.RecurringTransaction, n: int) -> date:
+    """
+    Returns the date of the rule's n-th occurrence, counting from 0 at `start_date`.
+    Monthly and yearly rules keep the day of month of `start_date`, or use the last day
+    of shorter months (a rule starting on Jan 31 occurs on Feb 28, then Mar 31).
+    """
+    if rule.interval == models.RecurringTransaction.Interval.DAILY:
+        return rule.start_date + timedelta(days=n * rule.interval_count)
+    if rule.interval == models.RecurringTransaction.Interval.WEEKLY:
+        return rule.start_date + timedelta(weeks=n * rule.interval_count)
+
+    months = n * _months_per_step(rule)
+    year, month = divmod(rule.start_date.month - 1 + months, 12)
+    year += rule.start_date.year
+    day = min(rule.start_date.day, calendar.monthrange(year, month + 1)[1])
+    return date(year, month + 1, day)
+
+
+def occurrences(rule: models.RecurringTransaction) -> Iterator[date]:
+    """
+    Yields the dates of the rule's occurrences from its `next_date` onwards, without end;
+    `end_date` isn't applied.
+    """
+    start = rule.start_date
+    if rule.interval in (
+        models.RecurringTransaction.Interval.DAILY,
+        models.RecurringTransaction.Interval.WEEKLY,
+    ):
+        step = occurrence(rule, 1) - start
+        n = max(0, -(-(rule.next_date - start).days // step.days))
+    else:
+        months = (rule.next_date.year - start.year) * 12 + (
+            rule.next_date.month - start.month
+        )
+        n = max(0, months // _months_per_step(rule))
+        while occurrence(rule, n) < rule.next_date:
+            n += 1
+    while True:
+        yield occurrence(rule, n)
+        n += 1
+
+
+def _materialize_batch(rules: List[models.RecurringTransaction], until: date) -> int:
+    """
+    Saves the occurrences of a batch of rules up to `until` as transactions, and moves
+    the rules' watermarks past them.
+    Must be called inside the database transaction that locked the rules.
+
+    Returns:
+        The number of transactions created.
+    """
+    by_user: Dict[str, List[models.Transaction]] = defaultdict(list)
+    for rule in rules:
+        last = min(until, rule.end_date) if rule.end_date else until
+        for transaction_date in occurrences(rule):
+            if transaction_date > last:
+                rule.next_date = transaction_date
+                break
+            by_user[rule.user_id].append(
+                models.Transaction(
+                    user_id=rule.user_id,
+                    transaction_type=rule.transaction_type,
+                    amount=rule.amount,
+                    currency=rule.currency,
+                    transaction_date=transaction_date,
+                    name=rule.name,
+                    notes=rule.notes,
+                    tags=rule.tags,
+                )
+            )
+
+    created = [tr for transactions in by_user.values() for tr in transactions]
+    models.Transaction.objects.bulk_create(
+        created, batch_size=settings.IMPORT_BATCH_SIZE
+    )
+    for user_id, transactions in by_user.items():
+        db_user = models.User(pk=user_id)
+        rollups.adjust_many(
+            db_user,
+            (
+                (tr.transaction_type, tr.transaction_date, tr.currency, tr.amount, 1)
+                for tr in transactions
+            ),
+        )
+        versions.bump(db_user)
+    models.RecurringTransaction.objects.bulk_update(rules, ["next_date"])
+    return len(created)
+
+
+def materialize(
+    until: Optional[date] = None, batch_size: Optional[int] = None
+) -> MaterializeResult:
+    """
+    Saves every rule's occurrences that are due by `until` (today by default) as
+    transactions, for all users.
+
+    Due rules are processed `batch_size` at a time (`settings.RECURRING_BATCH_SIZE` by
+    default), each batch in its own database transaction: its rules are locked, their
+    occurrences inserted with `bulk_create`, the monthly totals and data versions of their
+    users updated, and their watermarks moved forward. Rows locked by a concurrent run
+    are skipped (on databases that support it), so runs can overlap.
+    """
+    until = until or date.today()
+    batch_size = batch_size or settings.RECURRING_BATCH_SIZE
+    due = models.RecurringTransaction.objects.filter(next_date__lte=until).filter(
+        Q(end_date__isnull=True) | Q(next_date__lte=F("end_date"))
+    )
+
+    rules = created = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                due.select_for_update(skip_locked=True).order_by("next_date", "id")[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+            created += _materialize_batch(batch, until)
+            rules += len(batch)
+    return MaterializeResult(rules, created)
@@ -0,0 +1,197 @@
+"""Functions to maintain the per-month transaction totals stored in `models.MonthlyTotal`."""
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from . import models, versions
+
+
+# (user ID, year, month, transaction type, currency)
+Period = Tuple[str, int, int, str, str]
+
+
+def _lock_users(user: Optional[models.User] = None) -> None:
+    """
+    Locks the user's row (every user's if None) until the end of the database
+    transaction. Changes to the monthly totals take this lock first, so `rebuild` and
+    `verify` never run between a change to the raw transactions and its rollup update.
+    """
+    users = models.User.objects.select_for_update()
+    if user is not None:
+        users = users.filter(pk=user.pk)
+    list(users.values_list("pk", flat=True))
+
+
+def _adjust(
+    db_user: models.User,
+    transaction_type: str,
+    transaction_date: date,
+    currency: str,
+    amount: int,
+    count: int,
+) -> None:
+    row, _ = models.MonthlyTotal.objects.select_for_update().get_or_create(
+        user=db_user,
+        year=transaction_date.year,
+        month=transaction_date.month,
+        transaction_type=transaction_type,
+        currency=currency,
+    )
+    models.MonthlyTotal.objects.filter(pk=row.pk).update(
+        total=F("total") + amount, count=F("count") + count
+    )
+
+
+def adjust(
+    db_user: models.User,
+    transaction_type: str,
+    transaction_date: date,
+    currency: str,
+    amount: int,
+    count: int,
+) -> None:
+    """
+    Adds `amount` and `count` to the user's total in `currency` for the month of
+    `transaction_date`.
+    Pass negative values to remove a transaction from the total.
+    Must be called inside the same database transaction as the change it accounts for.
+    """
+    _lock_users(db_user)
+    _adjust(db_user, transaction_type, transaction_date, currency, amount, count)
+
+
+def add(tr: models.Transaction) -> None:
+    """
+    Accounts for a newly saved transaction.
+    """
+    adjust(tr.user, tr.transaction_type, tr.transaction_date, tr.currency, tr.amount, 1)
+
+
+def adjust_many(
+    db_user: models.User, changes: Iterable[Tuple[str, date, str, int, int]]
+) -> None:
+    """
+    Applies many (transaction type, transaction date, currency, amount, count) changes
+    to the user's monthly totals, with one rollup update per month, type and currency
+    that has a net change.
+    Must be called inside the same database transaction as the changes it accounts for.
+    """
+    totals: Dict[Tuple[str, date, str], List[int]] = defaultdict(lambda: [0, 0])
+    for transaction_type, transaction_date, currency, amount, count in changes:
+        key = (transaction_type, transaction_date.replace(day=1), currency)
+        totals[key][0] += amount
+        totals[key][1] += count
+    changed = [(key, change) for key, change in totals.items() if any(change)]
+    if changed:
+        _lock_users(db_user)
+    for (transaction_type, month_start, currency), (amount, count) in changed:
+        _adjust(db_user, transaction_type, month_start, currency, amount, count)
+
+
+def compute(user: Optional[models.User] = None) -> Dict[Period, Tuple[int, int]]:
+    """
+    Aggregates the monthly totals from the raw transactions table.
+
+    Arguments:
+        user -> Only compute the totals of this user. Computes them for every user if None.
+
+    Returns:
+        Dictionary mapping (user ID, year, month, type, currency) to (total, count).
+    """
+    transactions = models.Transaction.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+    rows = (
+        transactions.annotate(
+            year=ExtractYear("transaction_date"), month=ExtractMonth("transaction_date")
+        )
+        .values("user_id", "year", "month", "transaction_type", "currency")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    return {
+        (r["user_id"], r["year"], r["month"], r["transaction_type"], r["currency"]): (
+            r["total"],
+            r["count"],
+        )
+        for r in rows
+    }
+
+
+def rebuild(user: Optional[models.User] = None) -> int:
+    """
+    Replaces the stored monthly totals with ones aggregated from the raw transactions.
+    The users' rows are locked while their totals are aggregated and replaced, so changes
+    to their transactions wait for it to finish.
+
+    Arguments:
+        user -> Only rebuild the totals of this user. Rebuilds every user's totals if None.
+
+    Returns:
+        The number of monthly totals written.
+    """
+    with transaction.atomic():
+        _lock_users(user)
+        computed = compute(user)
+        stored = models.MonthlyTotal.objects.all()
+        if user is not None:
+            stored = stored.filter(user=user)
+        stored.delete()
+        models.MonthlyTotal.objects.bulk_create(
+            models.MonthlyTotal(
+                user_id=user_id,
+                year=year,
+                month=month,
+                transaction_type=transaction_type,
+                currency=currency,
+                total=total,
+                count=count,
+            )
+            for (user_id, year, month, transaction_type, currency), (
+                total,
+                count,
+            ) in computed.items()
+        )
+        # the stored totals may have changed
+        if user is not None:
+            versions.bump(user)
+        else:
+            versions.bump_all()
+    return len(computed)
+
+
+def verify(user: Optional[models.User] = None) -> List[Period]:
+    """
+    Compares the stored monthly totals with ones aggregated from the raw transactions.
+
+    Arguments:
+        user -> Only verify the totals of this user. Verifies every user's totals if None.
+
+    Returns:
+        The periods whose stored total or count doesn't match the raw transactions.
+    """
+    with transaction.atomic():
+        _lock_users(user)
+        computed = compute(user)
+        stored_rows = models.MonthlyTotal.objects.filter(count__gt=0)
+        if user is not None:
+            stored_rows = stored_rows.filter(user=user)
+        stored = {
+            (r.user_id, r.year, r.month, r.transaction_type, r.currency): (
+                r.total,
+                r.count,
+            )
+            for r in stored_rows
+        }
+
+    mismatched = []
+    for period in computed.keys() | stored.keys():
+        expected_total, expected_count = computed.get(period, (0, 0))
+        total, count = stored.get(period, (0, 0))
+        if (total, count) != (expected_total, expected_count):
+            mismatched.append(period)
+    return sorted(mismatched)
@@ -0,0 +1,19 @@
+from typing import Optional
+
+from django import template
+
+from app import money as money_utils
+
+
+register = template.Library()
+
+
+@register.filter
+def money(value: Optional[int], currency: str):
+    """
+    Formats an amount stored in minor units in major units of `currency`,
+    e.g. `{{ 1234|money:"USD" }}` renders 12.34.
+    """
+    if value is None:
+        return value
+    return money_utils.from_minor(value, currency)
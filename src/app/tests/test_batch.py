@@ -0,0 +1,174 @@
+import json
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app import auth, benchmarking, models, rollups
+
+
+class ApplyBatchTests(TestCase):
+    def setUp(self):
+        models.User.objects.create(
+            id="batch-user", username="batch", email="batch@example.com", currency="USD"
+        )
+        self.user = auth.User.retrieve("batch-user")
+        self.kept = self.user.create_transaction(
+            "expenditure", 1250, "Groceries", date(2024, 3, 5), "Food/Groceries"
+        )
+        self.deleted = self.user.create_transaction(
+            "income", 300000, "Salary", date(2024, 3, 1)
+        )
+
+    def test_missing_id_rolls_back_everything(self):
+        with self.assertRaises(models.Transaction.DoesNotExist):
+            self.user.apply_batch(
+                create=[
+                    {
+                        "transaction_type": "income",
+                        "amount": 500,
+                        "name": "Refund",
+                        "transaction_date": date(2024, 4, 2),
+                    }
+                ],
+                update={self.kept.id: {"amount": 999}, 123456: {"name": "Missing"}},
+                delete=[self.deleted.id],
+            )
+
+        self.assertEqual(
+            sorted(models.Transaction.objects.values_list("id", "amount", "name")),
+            sorted(
+                [
+                    (self.kept.id, 1250, "Groceries"),
+                    (self.deleted.id, 300000, "Salary"),
+                ]
+            ),
+        )
+        self.assertEqual(rollups.verify(), [])
+
+    def test_partial_update_writes_only_changed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.user.apply_batch(update={self.kept.id: {"name": "Weekly shop"}})
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("UPDATE") and "app_transaction" in query["sql"]
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"name"', updates[0])
+        for column in ("amount", "transaction_type", "transaction_date", "tags"):
+            self.assertNotIn(f'"{column}"', updates[0])
+
+        self.kept.refresh_from_db()
+        self.assertEqual(
+            (self.kept.name, self.kept.amount, self.kept.tags),
+            ("Weekly shop", 1250, "Food/Groceries"),
+        )
+
+    def test_rollups_match_after_batch(self):
+        result = self.user.apply_batch(
+            create=[
+                {
+                    "transaction_type": "Expenditure",
+                    "amount": 4200,
+                    "name": "Rent",
+                    "transaction_date": date(2024, 5, 1),
+                    "tags": "Rent",
+                },
+                {
+                    "transaction_type": "income",
+                    "amount": 800,
+                    "name": "Interest",
+                    "transaction_date": date(2024, 3, 31),
+                },
+            ],
+            update={
+                self.kept.id: {
+                    "amount": 2000,
+                    "transaction_date": date(2024, 4, 10),
+                    "transaction_type": "income",
+                }
+            },
+            delete=[self.deleted.id],
+        )
+
+        self.assertEqual(result, auth.BatchResult(2, 1, 1))
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(
+            self.user.get_totals(auth.Period.month(2024, 4)),
+            {"income": 2000},
+        )
+
+
+class BatchViewTests(TestCase):
+    def setUp(self):
+        firebase = benchmarking.fake_firebase()
+        fake = firebase.__enter__()
+        self.addCleanup(firebase.__exit__, None, None, None)
+        (db_user,) = benchmarking.seed(fake, 1, 0)
+        self.client = benchmarking.logged_in_client(db_user)
+        self.transaction = auth.User.retrieve(db_user.id).create_transaction(
+            "expenditure", 1250, "Groceries", date(2024, 3, 5)
+        )
+
+    def post_batch(self, batch):
+        return self.client.post(
+            "/transaction/batch", json.dumps(batch), content_type="application/json"
+        )
+
+    def test_duplicate_ids_are_rejected(self):
+        response = self.post_batch(
+            {
+                "update": [
+                    {"id": self.transaction.id, "title": "First"},
+                    {"id": self.transaction.id, "title": "Second"},
+                ]
+            }
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json(), {"errors": {"update": {"1": {"id": ["Duplicate ID."]}}}}
+        )
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.name, "Groceries")
+
+    def test_batch_keeps_rollups_consistent(self):
+        response = self.post_batch(
+            {
+                "create": [
+                    {
+                        "title": "Salary",
+                        "amount": "3000",
+                        "type": "income",
+                        "date": "2024-03-28",
+                    }
+                ],
+                "update": [{"id": self.transaction.id, "amount": "15.50"}],
+            }
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"created": 1, "updated": 1, "deleted": 0})
+        self.assertEqual(rollups.verify(), [])
+
+    def test_title_longer_than_column_is_rejected(self):
+        response = self.post_batch(
+            {
+                "create": [
+                    {
+                        "title": "x" * 31,
+                        "amount": "1",
+                        "type": "income",
+                        "date": "2024-03-28",
+                    }
+                ],
+                "update": [{"id": self.transaction.id, "title": "y" * 31}],
+            }
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"create", "update"})
+        self.assertEqual(models.Transaction.objects.count(), 1)
@@ -0,0 +1,73 @@
+from datetime import date
+
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app import auth, benchmarking
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        caches["fragments"].clear()
+        firebase = benchmarking.fake_firebase()
+        fake = firebase.__enter__()
+        self.addCleanup(firebase.__exit__, None, None, None)
+        (self.db_user,) = benchmarking.seed(fake, 1, 0)
+        self.client = benchmarking.logged_in_client(self.db_user)
+        self.user = auth.User.retrieve(self.db_user.id)
+        self.user.create_transaction("income", 300000, "Salary", date(2024, 2, 28))
+        self.user.create_transaction("expenditure", 1250, "Lunch", date(2024, 3, 5))
+
+    def test_default_period_is_latest_month(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/dashboard")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(str(response.context["period"]), "2024-03")
+        active_month_queries = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT DISTINCT "app_monthlytotal"."year"')
+        ]
+        self.assertEqual(len(active_month_queries), 1)
+        self.assertContains(response, "?period=2024-02")
+
+    def test_unchanged_page_is_not_modified(self):
+        response = self.client.get("/dashboard?period=2024-03")
+        etag = response["ETag"]
+        self.assertNotIn("Last-Modified", response)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/dashboard?period=2024-03", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(
+            any("app_transaction" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_write_changes_etag_and_fragments(self):
+        response = self.client.get("/dashboard?period=2024-03")
+        etag = response["ETag"]
+        self.assertContains(response, "12.50")
+
+        self.user.create_transaction("expenditure", 9900, "Shoes", date(2024, 3, 9))
+
+        response = self.client.get("/dashboard?period=2024-03", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertContains(response, "Shoes")
+        self.assertContains(response, "111.50")
+
+    def test_profile_change_changes_etag(self):
+        etag = self.client.get("/dashboard?period=2024-03")["ETag"]
+
+        self.db_user.currency = "EUR"
+        self.db_user.save()
+        auth._db_user_cache.clear()
+
+        response = self.client.get("/dashboard?period=2024-03", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
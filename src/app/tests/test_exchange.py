@@ -0,0 +1,140 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from app import analytics, auth, benchmarking, exchange, models, versions
+
+
+def rates(**rates):
+    return {currency: Decimal(rate) for currency, rate in rates.items()}
+
+
+class ExchangeTests(TestCase):
+    def setUp(self):
+        exchange._rates_cache.clear()
+        self.addCleanup(exchange._rates_cache.clear)
+        exchange.load(rates(EUR="1", USD="1.25", JPY="150"))
+
+    def test_parse(self):
+        parsed = exchange.parse(
+            io.StringIO('{"base": "eur", "rates": {"usd": 1.25, "JPY": 150}}')
+        )
+        self.assertEqual(parsed, rates(EUR="1", USD="1.25", JPY="150"))
+        for content in (
+            '{"rates": []}',
+            '{"rates": {"USD": 0}}',
+            '{"rates": {"US": 1}}',
+        ):
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    exchange.parse(io.StringIO(content))
+
+    def test_factor_scales_between_exponents(self):
+        self.assertEqual(exchange.factor("", "USD"), 1)
+        self.assertEqual(exchange.factor("EUR", "USD"), Decimal("1.25"))
+        # 1 yen is 1/120 dollars, and dollars have 2 decimal places
+        self.assertEqual(exchange.factor("JPY", "USD"), Decimal("1.25") / 150 * 100)
+        self.assertEqual(
+            exchange.factor("usd", "JPY"), Decimal(150) / Decimal("1.25") / 100
+        )
+
+    def test_convert_totals_rounds_once(self):
+        # 416.25 + 83.33... cents; rounding each first would give 499
+        self.assertEqual(
+            exchange.convert_totals([("EUR", 333), ("JPY", 100), ("", 0)], "USD"), 500
+        )
+
+    def test_unknown_currency(self):
+        for from_currency, to_currency in (("GBP", "USD"), ("USD", "GBP")):
+            with self.subTest(from_currency=from_currency, to_currency=to_currency):
+                with self.assertRaises(exchange.UnknownCurrency):
+                    exchange.factor(from_currency, to_currency)
+        self.assertFalse(exchange.is_supported("GBP"))
+        self.assertTrue(exchange.is_supported("jpy"))
+
+    def test_load_refuses_to_drop_currency_in_use(self):
+        db_user = models.User.objects.create(
+            id="fx-user", username="fx", email="fx@example.com", currency="USD"
+        )
+        models.Transaction.objects.create(
+            user=db_user,
+            transaction_type="expenditure",
+            amount=1000,
+            currency="JPY",
+            name="Sushi",
+            transaction_date=date(2024, 3, 5),
+        )
+
+        for new_rates in (rates(EUR="1", USD="1.3"), rates(EUR="1", JPY="160")):
+            with self.subTest(new_rates=new_rates):
+                with self.assertRaises(ValueError):
+                    exchange.load(new_rates)
+        self.assertEqual(exchange.get_rates(), rates(EUR="1", USD="1.25", JPY="150"))
+
+        self.assertEqual(exchange.load(rates(USD="1.3", JPY="160")), 2)
+        self.assertEqual(exchange.get_rates(), rates(USD="1.3", JPY="160"))
+
+    def test_rates_version(self):
+        version = exchange.rates_version()
+        self.assertEqual(exchange.rates_version(), version)
+
+        exchange.load(rates(EUR="1", USD="1.30", JPY="150"))
+        self.assertNotEqual(exchange.rates_version(), version)
+
+
+class ConvertedCacheTests(TestCase):
+    """
+    Another process loading rates only bumps the data versions; this process keeps
+    its rates until they expire, and must not mix them with the new versions.
+    """
+
+    def setUp(self):
+        exchange._rates_cache.clear()
+        self.addCleanup(exchange._rates_cache.clear)
+        caches["fragments"].clear()
+        exchange.load(rates(EUR="1", USD="1.25", JPY="150"))
+
+        firebase = benchmarking.fake_firebase()
+        fake = firebase.__enter__()
+        self.addCleanup(firebase.__exit__, None, None, None)
+        (self.db_user,) = benchmarking.seed(fake, 1, 0)
+        self.client = benchmarking.logged_in_client(self.db_user)
+        auth.User.retrieve(self.db_user.id).create_transaction(
+            "expenditure", 1500, "Sushi", date(2024, 3, 6), currency="JPY"
+        )
+
+    def load_elsewhere(self, **new_rates):
+        for currency, rate in new_rates.items():
+            models.ExchangeRate.objects.filter(currency=currency).update(rate=rate)
+        versions.bump_all()
+
+    def test_dashboard(self):
+        response = self.client.get("/dashboard?period=2024-03")
+        self.assertContains(response, "12.50")
+
+        self.load_elsewhere(USD="2.5")
+        # still converting with the old rates, consistently
+        self.assertContains(self.client.get("/dashboard?period=2024-03"), "12.50")
+
+        exchange._rates_cache.clear()
+        response = self.client.get("/dashboard?period=2024-03")
+        self.assertContains(response, "25.00")
+        self.assertNotContains(response, "12.50")
+
+    def test_analytics(self):
+        self.assertEqual(
+            analytics.get_analysis(self.db_user)["totals"]["expenditure"], 1250
+        )
+
+        self.load_elsewhere(USD="2.5")
+        self.assertEqual(
+            analytics.get_analysis(self.db_user)["totals"]["expenditure"], 1250
+        )
+
+        exchange._rates_cache.clear()
+        self.assertEqual(
+            analytics.get_analysis(self.db_user)["totals"]["expenditure"], 2500
+        )
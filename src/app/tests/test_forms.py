@@ -0,0 +1,39 @@
+from django.test import SimpleTestCase
+
+from app import forms, money
+
+
+class TransactionFormTests(SimpleTestCase):
+    def form(self, amount, currency=""):
+        return forms.TransactionForm(
+            {
+                "title": "Salary",
+                "amount": amount,
+                "currency": currency,
+                "type": "income",
+                "date": "2024-03-05",
+            },
+            currency="USD",
+        )
+
+    def test_amount_in_minor_units(self):
+        form = self.form("12.34")
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["amount"], 1234)
+
+    def test_too_many_decimal_places(self):
+        form = self.form("12.345")
+        self.assertFalse(form.is_valid())
+        self.assertIn("amount", form.errors)
+
+    def test_amount_too_large_to_store(self):
+        for amount in ("1e30", "-1e30", "92233720368547758.08"):
+            with self.subTest(amount=amount):
+                form = self.form(amount)
+                self.assertFalse(form.is_valid())
+                self.assertEqual(form.errors["amount"], ["This amount is too large."])
+
+    def test_largest_amount(self):
+        form = self.form("92233720368547758.07")
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data["amount"], money.MAX_MINOR)
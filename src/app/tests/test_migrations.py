@@ -0,0 +1,94 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class AmountsInMinorUnitsMigrationTests(TransactionTestCase):
+    before = [("app", "0013_transaction_user_date_id_idx")]
+    after = [("app", "0014_amounts_in_minor_units")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        self.latest = MigrationExecutor(connection).loader.graph.leaf_nodes()
+        self.addCleanup(self.migrate, self.latest)
+
+        apps = self.migrate(self.before)
+        User = apps.get_model("app", "User")
+        Transaction = apps.get_model("app", "Transaction")
+        MonthlyTotal = apps.get_model("app", "MonthlyTotal")
+
+        for uid, currency, amounts in (
+            ("usd-user", "USD", [12.5, 0.1, 0.2, 1999.99]),
+            ("jpy-user", "JPY", [1000.0, 250.0]),
+            ("kwd-user", "KWD", [1.234]),
+        ):
+            user = User.objects.create(
+                id=uid, username=uid, email=f"{uid}@example.com", currency=currency
+            )
+            for amount in amounts:
+                Transaction.objects.create(
+                    user=user,
+                    transaction_type="expenditure",
+                    amount=amount,
+                    name="Purchase",
+                    notes="",
+                    tags="",
+                    transaction_date="2024-03-05",
+                )
+            MonthlyTotal.objects.create(
+                user=user,
+                year=2024,
+                month=3,
+                transaction_type="expenditure",
+                total=sum(amounts),
+                count=len(amounts),
+            )
+
+    def test_forwards_converts_to_minor_units(self):
+        apps = self.migrate(self.after)
+        Transaction = apps.get_model("app", "Transaction")
+        MonthlyTotal = apps.get_model("app", "MonthlyTotal")
+
+        self.assertEqual(
+            sorted(Transaction.objects.values_list("user_id", "amount")),
+            [
+                ("jpy-user", 250),
+                ("jpy-user", 1000),
+                ("kwd-user", 1234),
+                ("usd-user", 10),
+                ("usd-user", 20),
+                ("usd-user", 1250),
+                ("usd-user", 199999),
+            ],
+        )
+        self.assertEqual(
+            dict(MonthlyTotal.objects.values_list("user_id", "total")),
+            {"jpy-user": 1250, "kwd-user": 1234, "usd-user": 201279},
+        )
+
+    def test_backwards_restores_major_units(self):
+        self.migrate(self.after)
+        apps = self.migrate(self.before)
+        Transaction = apps.get_model("app", "Transaction")
+        MonthlyTotal = apps.get_model("app", "MonthlyTotal")
+
+        self.assertEqual(
+            sorted(Transaction.objects.values_list("user_id", "amount")),
+            [
+                ("jpy-user", 250.0),
+                ("jpy-user", 1000.0),
+                ("kwd-user", 1.234),
+                ("usd-user", 0.1),
+                ("usd-user", 0.2),
+                ("usd-user", 12.5),
+                ("usd-user", 1999.99),
+            ],
+        )
+        totals = dict(MonthlyTotal.objects.values_list("user_id", "total"))
+        self.assertEqual(totals["jpy-user"], 1250.0)
+        self.assertAlmostEqual(totals["usd-user"], 2012.79)
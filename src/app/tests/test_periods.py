@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+
+from app import auth, benchmarking
+
+
+class PeriodTests(SimpleTestCase):
+    def test_month(self):
+        self.assertEqual(
+            auth.Period.month(2024, 2), auth.Period(date(2024, 2, 1), date(2024, 3, 1))
+        )
+        self.assertEqual(
+            auth.Period.month(2024, 12),
+            auth.Period(date(2024, 12, 1), date(2025, 1, 1)),
+        )
+
+    def test_year(self):
+        self.assertEqual(
+            auth.Period.year(2024), auth.Period(date(2024, 1, 1), date(2025, 1, 1))
+        )
+
+    def test_kind_and_str_round_trip(self):
+        cases = [
+            ("2024", "year", True),
+            ("2024-02", "month", True),
+            ("2024-01-01..2024-02-29", "range", True),
+            ("2024-02-10..2024-02-10", "range", False),
+        ]
+        for value, kind, whole_months in cases:
+            with self.subTest(value=value):
+                period = auth.parse_period(value)
+                self.assertEqual(period.kind, kind)
+                self.assertEqual(period.is_whole_months(), whole_months)
+                self.assertEqual(str(period), value)
+
+    def test_range_includes_last_day(self):
+        period = auth.parse_period("2024-02-10..2024-02-20")
+        self.assertEqual(period, auth.Period(date(2024, 2, 10), date(2024, 2, 21)))
+        self.assertEqual(period.last_day, date(2024, 2, 20))
+
+    def test_invalid_periods(self):
+        for value in (
+            "",
+            "24-13",
+            "2024-13",
+            "2024-02-30..2024-03-01",
+            "2024-03-01..2024-02-01",
+            "2024-03-01..",
+            "last month",
+        ):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    auth.parse_period(value)
+
+
+class PeriodParameterTests(TestCase):
+    def setUp(self):
+        firebase = benchmarking.fake_firebase()
+        fake = firebase.__enter__()
+        self.addCleanup(firebase.__exit__, None, None, None)
+        (db_user,) = benchmarking.seed(fake, 1, 0)
+        self.client = benchmarking.logged_in_client(db_user)
+        auth.User.retrieve(db_user.id).create_transaction(
+            "income", 300000, "Salary", date(2024, 2, 29)
+        )
+
+    def test_malformed_period_is_bad_request(self):
+        for url in ("/dashboard", "/api/summary"):
+            for query in ("period=2024-13", "period=2024-03-01..2024-02-01", "month=x"):
+                with self.subTest(url=url, query=query):
+                    response = self.client.get(f"{url}?{query}")
+                    self.assertEqual(response.status_code, 400)
+
+    def test_summary_for_period(self):
+        cases = [
+            ("period=2024", "2024", "3000.00"),
+            ("period=2024-02", "2024-02", "3000.00"),
+            ("month=2024-02", "2024-02", "3000.00"),
+            ("period=2024-02-01..2024-02-28", "2024-02-01..2024-02-28", None),
+            ("period=2024-02-29..2024-03-31", "2024-02-29..2024-03-31", "3000.00"),
+        ]
+        for query, period, income in cases:
+            with self.subTest(query=query):
+                data = self.client.get(f"/api/summary?{query}").json()
+                self.assertEqual(data["period"], period)
+                self.assertEqual(data["total_income"], income)
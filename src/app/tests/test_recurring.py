@@ -0,0 +1,171 @@
+from datetime import date
+from io import StringIO
+from itertools import islice
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from app import auth, models, recurring, rollups
+
+Interval = models.RecurringTransaction.Interval
+
+
+def rule(start_date, interval, interval_count=1, next_date=None, end_date=None):
+    return models.RecurringTransaction(
+        start_date=start_date,
+        next_date=next_date or start_date,
+        end_date=end_date,
+        interval=interval,
+        interval_count=interval_count,
+    )
+
+
+def first(dates, count):
+    return list(islice(dates, count))
+
+
+class OccurrenceTests(SimpleTestCase):
+    def test_monthly_clips_to_month_end(self):
+        r = rule(date(2023, 12, 31), Interval.MONTHLY)
+        self.assertEqual(
+            first(recurring.occurrences(r), 5),
+            [
+                date(2023, 12, 31),
+                date(2024, 1, 31),
+                date(2024, 2, 29),
+                date(2024, 3, 31),
+                date(2024, 4, 30),
+            ],
+        )
+
+    def test_clipping_does_not_carry_over(self):
+        r = rule(date(2023, 1, 31), Interval.MONTHLY)
+        self.assertEqual(recurring.occurrence(r, 1), date(2023, 2, 28))
+        self.assertEqual(recurring.occurrence(r, 2), date(2023, 3, 31))
+
+    def test_yearly_from_leap_day(self):
+        r = rule(date(2024, 2, 29), Interval.YEARLY)
+        self.assertEqual(
+            first(recurring.occurrences(r), 5),
+            [
+                date(2024, 2, 29),
+                date(2025, 2, 28),
+                date(2026, 2, 28),
+                date(2027, 2, 28),
+                date(2028, 2, 29),
+            ],
+        )
+
+    def test_interval_count(self):
+        cases = [
+            (Interval.DAILY, [date(2024, 1, 30), date(2024, 2, 2), date(2024, 2, 5)]),
+            (
+                Interval.WEEKLY,
+                [date(2024, 1, 30), date(2024, 2, 20), date(2024, 3, 12)],
+            ),
+            (
+                Interval.MONTHLY,
+                [date(2024, 1, 30), date(2024, 4, 30), date(2024, 7, 30)],
+            ),
+            (
+                Interval.YEARLY,
+                [date(2024, 1, 30), date(2027, 1, 30), date(2030, 1, 30)],
+            ),
+        ]
+        for interval, expected in cases:
+            with self.subTest(interval=interval):
+                r = rule(date(2024, 1, 30), interval, interval_count=3)
+                self.assertEqual(first(recurring.occurrences(r), 3), expected)
+
+    def test_occurrences_resume_from_next_date(self):
+        cases = [
+            (Interval.DAILY, date(2024, 2, 4), date(2024, 2, 6)),
+            (Interval.WEEKLY, date(2024, 2, 21), date(2024, 2, 21)),
+            (Interval.MONTHLY, date(2024, 5, 1), date(2024, 7, 31)),
+            (Interval.YEARLY, date(2024, 2, 1), date(2027, 1, 31)),
+        ]
+        for interval, next_date, expected in cases:
+            with self.subTest(interval=interval):
+                r = rule(date(2024, 1, 31), interval, 3, next_date=next_date)
+                self.assertEqual(next(recurring.occurrences(r)), expected)
+
+
+class MaterializeTests(TestCase):
+    def setUp(self):
+        models.User.objects.create(
+            id="recurring-user",
+            username="recurring",
+            email="recurring@example.com",
+            currency="USD",
+        )
+        self.user = auth.User.retrieve("recurring-user")
+
+    def dates(self, name):
+        return list(
+            models.Transaction.objects.filter(name=name)
+            .order_by("transaction_date")
+            .values_list("transaction_date", flat=True)
+        )
+
+    def test_end_date(self):
+        r = self.user.create_recurring_transaction(
+            "expenditure",
+            1500,
+            "Gym",
+            date(2024, 1, 31),
+            Interval.MONTHLY,
+            end_date=date(2024, 4, 15),
+        )
+
+        result = recurring.materialize(until=date(2024, 12, 31))
+
+        self.assertEqual(result, recurring.MaterializeResult(1, 3))
+        self.assertEqual(
+            self.dates("Gym"), [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)]
+        )
+        r.refresh_from_db()
+        self.assertEqual(r.next_date, date(2024, 4, 30))
+        self.assertEqual(
+            recurring.materialize(until=date(2025, 12, 31)),
+            recurring.MaterializeResult(0, 0),
+        )
+
+    def test_rerun_is_idempotent(self):
+        self.user.create_recurring_transaction(
+            "income", 300000, "Salary", date(2024, 1, 31), Interval.MONTHLY
+        )
+        self.user.create_recurring_transaction(
+            "expenditure", 500, "Coffee", date(2024, 3, 1), Interval.WEEKLY, 2
+        )
+
+        first_run = recurring.materialize(until=date(2024, 4, 30), batch_size=1)
+        self.assertEqual(first_run, recurring.MaterializeResult(2, 9))
+        self.assertEqual(
+            recurring.materialize(until=date(2024, 4, 30)),
+            recurring.MaterializeResult(0, 0),
+        )
+        call_command("materialize_recurring", until="2024-05-31", stdout=StringIO())
+
+        self.assertEqual(
+            self.dates("Salary"),
+            [
+                date(2024, 1, 31),
+                date(2024, 2, 29),
+                date(2024, 3, 31),
+                date(2024, 4, 30),
+                date(2024, 5, 31),
+            ],
+        )
+        self.assertEqual(
+            self.dates("Coffee"),
+            [
+                date(2024, 3, 1),
+                date(2024, 3, 15),
+                date(2024, 3, 29),
+                date(2024, 4, 12),
+                date(2024, 4, 26),
+                date(2024, 5, 10),
+                date(2024, 5, 24),
+            ],
+        )
+        self.assertEqual(rollups.verify(), [])
@@ -0,0 +1,94 @@
+from datetime import date
+
+from django.test import TestCase
+
+from app import auth, imports, models, rollups
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        models.User.objects.create(
+            id="rollup-user",
+            username="rollup",
+            email="rollup@example.com",
+            currency="USD",
+        )
+        self.user = auth.User.retrieve("rollup-user")
+
+    def assertRollupsMatch(self):
+        stored = {
+            (row.user_id, row.year, row.month, row.transaction_type, row.currency): (
+                row.total,
+                row.count,
+            )
+            for row in models.MonthlyTotal.objects.filter(count__gt=0)
+        }
+        self.assertEqual(stored, rollups.compute())
+        self.assertEqual(rollups.verify(), [])
+
+    def test_create(self):
+        self.user.create_transaction("income", 300000, "Salary", date(2024, 1, 31))
+        self.user.create_transaction("expenditure", 1250, "Lunch", date(2024, 1, 2))
+        self.user.create_transaction("expenditure", 750, "Coffee", date(2024, 2, 1))
+
+        self.assertRollupsMatch()
+        self.assertEqual(
+            self.user.get_totals(auth.Period.month(2024, 1)),
+            {"income": 300000, "expenditure": 1250},
+        )
+
+    def test_update_moves_amount_between_months_and_types(self):
+        tr = self.user.create_transaction(
+            "expenditure", 1250, "Lunch", date(2024, 1, 2)
+        )
+        self.user.create_transaction("expenditure", 500, "Snack", date(2024, 1, 3))
+
+        self.user.update_transaction(
+            tr.id, transaction_type="income", transaction_date=date(2024, 3, 4)
+        )
+        self.assertRollupsMatch()
+        self.user.update_transaction(tr.id, amount=2000)
+        self.assertRollupsMatch()
+        self.assertEqual(
+            self.user.get_totals(auth.Period.month(2024, 3)), {"income": 2000}
+        )
+
+    def test_delete(self):
+        tr = self.user.create_transaction(
+            "expenditure", 1250, "Lunch", date(2024, 1, 2)
+        )
+        self.user.create_transaction("expenditure", 500, "Snack", date(2024, 1, 3))
+
+        self.user.delete_transaction(tr.id)
+        self.assertRollupsMatch()
+        self.assertEqual(
+            self.user.get_totals(auth.Period.month(2024, 1)), {"expenditure": 500}
+        )
+
+    def test_import(self):
+        lines = [
+            "title,amount,type,date,spending_type\n",
+            "Salary,3000,income,2024-01-31,\n",
+            "Rent,1200.50,expenditure,2024-02-01,Rent\n",
+            "Broken,abc,expenditure,2024-02-02,\n",
+            "Groceries,80.25,expenditure,2024-02-14,Food/Groceries\n",
+        ]
+
+        result = self.user.import_transactions(
+            imports.parse(lines, "csv"), batch_size=2
+        )
+
+        self.assertEqual(result.created, 3)
+        self.assertEqual([error.row for error in result.errors], [4])
+        self.assertRollupsMatch()
+        self.assertEqual(
+            self.user.get_totals(auth.Period.month(2024, 2)), {"expenditure": 128075}
+        )
+
+    def test_rebuild_repairs_drift(self):
+        self.user.create_transaction("income", 300000, "Salary", date(2024, 1, 31))
+        models.MonthlyTotal.objects.update(total=1)
+        self.assertEqual(len(rollups.verify()), 1)
+
+        rollups.rebuild()
+        self.assertRollupsMatch()
@@ -1,13 +1,34 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
 
 
+# the views that have async versions; which ones are served depends on settings.ASYNC_VIEWS
+request_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
     path("", views.index, name="index"),
-    path("user/login", views.login, name="login"),
-    path("user/signup", views.signup, name="signup"),
-    path("dashboard", views.dashboard, name="dashboard"),
-    path("user/logout", views.logout, name="logout"),
-    path("transaction/new", views.create_transaction, name="create-transaction"),
-    path("transaction/delete", views.delete_transaction, name="delete-transaction"),
+    path("user/login", request_views.login, name="login"),
+    path("user/signup", request_views.signup, name="signup"),
+    path("dashboard", request_views.dashboard, name="dashboard"),
+    path("analysis", views.analysis, name="analysis"),
+    path("user/logout", request_views.logout, name="logout"),
+    path(
+        "transaction/new", request_views.create_transaction, name="create-transaction"
+    ),
+    path(
+        "transaction/delete",
+        request_views.delete_transaction,
+        name="delete-transaction",
+    ),
+    path(
+        "transaction/recurring/new",
+        views.create_recurring_transaction,
+        name="create-recurring-transaction",
+    ),
+    path("transaction/batch", views.batch_transactions, name="batch-transactions"),
+    path("transaction/import", views.import_transactions, name="import-transactions"),
+    path("transaction/export", views.export_transactions, name="export-transactions"),
+    path("api/transactions", api.transactions, name="api-transactions"),
+    path("api/summary", api.summary, name="api-summary"),
 ]
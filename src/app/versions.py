@@ -0,0 +1,49 @@
+"""
+Per-user data versions.
+
+A user's data version goes up with every change to their transactions, inside the same
+database transaction, so anything derived from the transactions can be cached under
+(user ID, data version) and never has to be invalidated explicitly.
+"""
+from typing import NamedTuple, Optional
+
+from django.db.models import F
+
+from . import models
+
+
+class DataVersion(NamedTuple):
+    """
+    A user's data version.
+    """
+
+    version: int
+
+
+def bump(db_user: models.User) -> None:
+    """
+    Increments the user's data version.
+    Must be called inside the same database transaction as the change it accounts for.
+    """
+    models.User.objects.filter(pk=db_user.pk).update(data_version=F("data_version") + 1)
+
+
+def bump_all() -> None:
+    """
+    Increments every user's data version.
+    """
+    models.User.objects.update(data_version=F("data_version") + 1)
+
+
+def current(uid: str) -> Optional[DataVersion]:
+    """
+    Reads the user's data version, with a primary key lookup.
+    The version isn't cached with the rest of the user's row, since other processes change it.
+    Returns None if the user doesn't exist.
+    """
+    version = (
+        models.User.objects.filter(pk=uid)
+        .values_list("data_version", flat=True)
+        .first()
+    )
+    return DataVersion(version) if version is not None else None
@@ -1,12 +1,25 @@
+import codecs
+import hashlib
+import json
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
 from django import http
+from django.conf import settings
+from django.core.cache import caches
 from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import cached_property
 from django.views.decorators.http import require_GET, require_POST
 
-from . import auth, forms
+from . import auth, exchange, exports, forms, imports, instrumentation, models, versions
 
 
 def index(request: http.HttpRequest) -> http.HttpResponse:
-    return render(request, "index.html")
+    with instrumentation.timed("render"):
+        return render(request, "index.html")
 
 
 @require_POST
@@ -49,43 +62,233 @@ def signup(request: http.HttpRequest) -> http.HttpResponse:
         )
 
 
+def _dashboard_url(**params: Optional[str]) -> str:
+    """
+    Builds a URL to the dashboard with the given query parameters, skipping empty ones.
+    """
+    query = urlencode({key: value for key, value in params.items() if value})
+    return f"{reverse('dashboard')}?{query}"
+
+
 @require_GET
 @auth.authenticated()
 def dashboard(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
     """
     Route to render the dashboard for a user.
     """
-    incomes = user.get_income_transactions()
-    expenditures = user.get_expenditure_transactions()
-
-    this_month_income = user.get_total_income()
-    this_month_expenditure = user.get_total_expenditure()
-
-    if this_month_expenditure is None and this_month_income is None:
-        # both Nones, no preexisting transactions
-        difference = None
-    elif this_month_income is None:
-        # if income none but expenditure not none, difference is negative
-        difference = -this_month_expenditure
-    elif this_month_expenditure is None:
-        # expenditure none, so difference is positive
-        difference = this_month_income
-    else:
-        difference = this_month_income - this_month_expenditure
+    return render_dashboard(request, user)
 
-    return render(
-        request,
-        "budget.html",
-        {
-            "incomes": incomes,
-            "expenditures": expenditures,
-            "currency": user.currency,
-            "username": user.username,
-            "total_income": this_month_income,
-            "total_expenditure": this_month_expenditure,
-            "difference": difference,
-        },
+
+class DashboardData:
+    """
+    The transactions, totals and navigation links shown on the dashboard for one period.
+    Everything is queried lazily, on first access, so cached fragments of the dashboard
+    that are never rendered never run their queries. `active_months` can be passed
+    when the request already queried them.
+    """
+
+    def __init__(
+        self,
+        user: auth.User,
+        period: auth.Period,
+        income_after: Optional[str],
+        expenditure_after: Optional[str],
+        active_months: Optional[List[Tuple[int, int]]] = None,
+    ) -> None:
+        self.user = user
+        self.period = period
+        self.income_after = income_after
+        self.expenditure_after = expenditure_after
+        self.active_months = active_months
+
+    @cached_property
+    def summary(self) -> dict:
+        return self.user.get_dashboard_summary(self.period)
+
+    @cached_property
+    def incomes(self) -> auth.TransactionPage:
+        return self.user.get_income_transactions(self.period, self.income_after)
+
+    @cached_property
+    def expenditures(self) -> auth.TransactionPage:
+        return self.user.get_expenditure_transactions(
+            self.period, self.expenditure_after
+        )
+
+    @cached_property
+    def _months(self) -> List[Tuple[date, str]]:
+        if self.active_months is None:
+            self.active_months = self.user.get_active_months()
+        return [(date(y, m, 1), f"{y:04}-{m:02}") for y, m in self.active_months]
+
+    @cached_property
+    def months(self) -> List[dict]:
+        current = str(self.period)
+        return [
+            {
+                "date": start,
+                "url": _dashboard_url(period=value),
+                "current": value == current,
+            }
+            for start, value in self._months
+        ]
+
+    @cached_property
+    def previous_month_url(self) -> Optional[str]:
+        older = [value for start, value in self._months if start < self.period.start]
+        return _dashboard_url(period=older[-1]) if older else None
+
+    @cached_property
+    def next_month_url(self) -> Optional[str]:
+        newer = [value for start, value in self._months if start >= self.period.end]
+        return _dashboard_url(period=newer[0]) if newer else None
+
+    @cached_property
+    def income_next_url(self) -> Optional[str]:
+        if not self.incomes.next_cursor:
+            return None
+        return _dashboard_url(
+            period=str(self.period),
+            income_after=self.incomes.next_cursor,
+            expenditure_after=self.expenditure_after,
+        )
+
+    @cached_property
+    def expenditure_next_url(self) -> Optional[str]:
+        if not self.expenditures.next_cursor:
+            return None
+        return _dashboard_url(
+            period=str(self.period),
+            income_after=self.income_after,
+            expenditure_after=self.expenditures.next_cursor,
+        )
+
+
+def _default_period(months: List[Tuple[int, int]]) -> auth.Period:
+    """
+    The period the dashboard shows by default: the latest of the user's active months
+    (see `auth.User.get_active_months`), or the current month.
+    """
+    if months:
+        return auth.Period.month(*months[-1])
+    return auth.Period.current_month()
+
+
+def _dashboard_etag(
+    user: auth.User,
+    data_version: versions.DataVersion,
+    period: auth.Period,
+    *cursors: Optional[str],
+) -> str:
+    """
+    Builds a weak ETag for a dashboard page; it changes whenever the user's data or the
+    exchange rates do. It's weak because every render has a new CSRF token.
+    """
+    parts = [
+        user.id,
+        user.username,
+        user.currency,
+        data_version.version,
+        exchange.rates_version(),
+        period,
+    ]
+    digest = hashlib.sha1(
+        ":".join(str(part) for part in parts + list(cursors)).encode()
     )
+    return f'W/"{digest.hexdigest()}"'
+
+
+def render_dashboard(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
+    """
+    Renders the dashboard for a user.
+    Shows the transactions and totals of one period at a time; the `period` query parameter
+    selects it ("YYYY", "YYYY-MM" or "YYYY-MM-DD..YYYY-MM-DD", see `auth.parse_period`;
+    `month` is accepted too), and defaults to the latest month the user has transactions in.
+    `income_after` and `expenditure_after` are the pagination cursors of each list.
+
+    The totals box and the transaction lists are cached in the "fragments" cache, keyed
+    by the user's data version and the exchange rates' version; a repeat visit costs one
+    query for the data version.
+    Responses carry an ETag derived from the versions and the user's profile, and
+    conditional requests for an unchanged page are answered with 304 Not Modified before
+    rendering. There is no Last-Modified: the page can change without the user's data
+    changing (a new username, currency or exchange rates).
+    """
+    income_after = request.GET.get("income_after")
+    expenditure_after = request.GET.get("expenditure_after")
+
+    try:
+        for cursor in (income_after, expenditure_after):
+            if cursor is not None:
+                auth.decode_cursor(cursor)
+
+        if "period" in request.GET:
+            period = auth.parse_period(request.GET["period"])
+        elif "month" in request.GET:
+            period = auth.Period.month(*auth.parse_month(request.GET["month"]))
+        else:
+            period = None
+    except ValueError:
+        return http.HttpResponseBadRequest("Invalid period or pagination cursor.")
+
+    data_version = versions.current(user.id)
+    # queried at most once per request, for the default period and the month links
+    active_months = None
+    if period is None:
+        key = f"dashboard-period:{user.id}:{data_version.version}"
+        default_period = caches["fragments"].get(key)
+        if default_period is None:
+            active_months = user.get_active_months()
+            default_period = str(_default_period(active_months))
+            caches["fragments"].set(key, default_period, settings.FRAGMENT_CACHE_TTL)
+        period = auth.parse_period(default_period)
+
+    # the page only changes with the user's data, so browsers can revalidate it
+    # without any transaction being queried or anything rendered
+    etag = _dashboard_etag(user, data_version, period, income_after, expenditure_after)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        with instrumentation.timed("render"):
+            response = render(
+                request,
+                "budget.html",
+                {
+                    "dashboard": DashboardData(
+                        user, period, income_after, expenditure_after, active_months
+                    ),
+                    "period": period,
+                    "currency": user.currency,
+                    "username": user.username,
+                    "user_id": user.id,
+                    "data_version": data_version.version,
+                    "rates_version": exchange.rates_version(),
+                    "fragment_cache_ttl": settings.FRAGMENT_CACHE_TTL,
+                },
+            )
+
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_GET
+@auth.authenticated()
+def analysis(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
+    """
+    Renders the Analysis tab: the user's spending per tag, monthly income and spending
+    with their rolling averages, and savings rates, over all of their transactions.
+    """
+    with instrumentation.timed("render"):
+        return render(
+            request,
+            "analysis.html",
+            {
+                "analysis": user.get_analysis(),
+                "window": settings.ANALYTICS_ROLLING_WINDOW,
+                "currency": user.currency,
+                "username": user.username,
+            },
+        )
 
 
 @require_POST
@@ -94,7 +297,16 @@ def create_transaction(request: http.HttpRequest, user: auth.User) -> http.HttpR
     """
     Creates a new transaction for the user.
     """
-    form = forms.TransactionForm(request.POST)
+    return save_new_transaction(request, user)
+
+
+def save_new_transaction(
+    request: http.HttpRequest, user: auth.User
+) -> http.HttpResponse:
+    """
+    Validates the submitted transaction form and saves the transaction for the user.
+    """
+    form = forms.TransactionForm(request.POST, currency=user.currency)
 
     if form.is_valid():
         user.create_transaction(
@@ -103,6 +315,7 @@ def create_transaction(request: http.HttpRequest, user: auth.User) -> http.HttpR
             name=form.cleaned_data["title"],
             transaction_date=form.cleaned_data["date"],
             spending_type=form.cleaned_data["spending_type"],
+            currency=form.cleaned_data["currency"],
         )
         return redirect("dashboard")
     else:
@@ -111,11 +324,217 @@ def create_transaction(request: http.HttpRequest, user: auth.User) -> http.HttpR
         )
 
 
+@require_POST
+@auth.authenticated()
+def create_recurring_transaction(
+    request: http.HttpRequest, user: auth.User
+) -> http.HttpResponse:
+    """
+    Creates a recurring transaction rule for the user.
+    Its occurrences show up once the `materialize_recurring` command has run.
+    """
+    form = forms.RecurringTransactionForm(request.POST, currency=user.currency)
+    if not form.is_valid():
+        return http.JsonResponse({"errors": form.errors}, status=400)
+
+    rule = user.create_recurring_transaction(
+        transaction_type=form.cleaned_data["type"],
+        amount=form.cleaned_data["amount"],
+        name=form.cleaned_data["title"],
+        start_date=form.cleaned_data["date"],
+        interval=form.cleaned_data["interval"],
+        interval_count=form.cleaned_data["interval_count"],
+        end_date=form.cleaned_data["end_date"],
+        spending_type=form.cleaned_data["spending_type"],
+        notes=form.cleaned_data["notes"],
+        currency=form.cleaned_data["currency"],
+    )
+    return http.JsonResponse({"id": rule.id}, status=201)
+
+
+@require_POST
+@auth.authenticated()
+def import_transactions(
+    request: http.HttpRequest, user: auth.User
+) -> http.HttpResponse:
+    """
+    Imports transactions from an uploaded CSV or OFX file.
+    Responds with the number of imported transactions and the errors of the rows
+    that could not be imported.
+    """
+    form = forms.ImportForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return http.JsonResponse({"errors": form.errors}, status=400)
+
+    upload = form.cleaned_data["file"]
+    format = form.cleaned_data["format"] or imports.guess_format(upload.name)
+    if format is None:
+        return http.JsonResponse(
+            {"errors": {"format": ["Unknown file format."]}}, status=400
+        )
+
+    lines = codecs.iterdecode(upload, "utf-8-sig")
+    try:
+        result = user.import_transactions(imports.parse(lines, format))
+    except UnicodeDecodeError:
+        return http.JsonResponse(
+            {"errors": {"file": ["File is not UTF-8 encoded."]}}, status=400
+        )
+
+    return http.JsonResponse(
+        {
+            "created": result.created,
+            "errors": [error._asdict() for error in result.errors],
+        }
+    )
+
+
+def _batch_errors(forms_by_index: List[Tuple[int, Any]]) -> Dict[str, dict]:
+    """
+    Collects the errors of the invalid forms of a batch, by the operation's index.
+    """
+    return {
+        str(index): form.errors for index, form in forms_by_index if not form.is_valid()
+    }
+
+
+@require_POST
+@auth.authenticated()
+def batch_transactions(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
+    """
+    Creates, updates and deletes many transactions in one request and one database
+    transaction; if any operation is invalid, nothing is changed.
+
+    The request body is a JSON object with these (all optional) keys:
+        create -> A list of transactions, as `forms.TransactionForm` data.
+        update -> A list of partial updates, as `forms.UpdateTransactionForm` data;
+        only the fields given are changed.
+        delete -> A list of transaction IDs.
+    Responds with the number of transactions created, updated and deleted, or with the
+    errors of the invalid operations, by operation and index.
+    """
+    try:
+        body = json.loads(request.body)
+        create = body.get("create", [])
+        update = body.get("update", [])
+        delete = body.get("delete", [])
+        if not all(isinstance(value, list) for value in (create, update, delete)):
+            raise ValueError("create, update and delete must be lists")
+        if not all(isinstance(row, dict) for row in create + update):
+            raise ValueError("transactions must be objects")
+        delete = [int(transaction_id) for transaction_id in delete]
+    except (ValueError, TypeError, AttributeError):
+        return http.JsonResponse({"errors": {"body": ["Invalid batch."]}}, status=400)
+
+    if len(create) + len(update) + len(delete) > settings.BATCH_MAX_OPERATIONS:
+        return http.JsonResponse(
+            {
+                "errors": {
+                    "body": [
+                        f"At most {settings.BATCH_MAX_OPERATIONS} operations "
+                        "can be sent at once."
+                    ]
+                }
+            },
+            status=400,
+        )
+
+    create_forms = [
+        (index, forms.TransactionForm(data, currency=user.currency))
+        for index, data in enumerate(create)
+    ]
+    update_forms = [
+        (index, forms.UpdateTransactionForm(data, currency=user.currency))
+        for index, data in enumerate(update)
+    ]
+    errors = {
+        "create": _batch_errors(create_forms),
+        "update": _batch_errors(update_forms),
+    }
+    if errors["create"] or errors["update"]:
+        return http.JsonResponse(
+            {"errors": {key: value for key, value in errors.items() if value}},
+            status=400,
+        )
+
+    changes: Dict[int, Dict[str, Any]] = {}
+    for index, form in update_forms:
+        transaction_id = form.cleaned_data["id"]
+        if transaction_id in changes:
+            return http.JsonResponse(
+                {"errors": {"update": {str(index): {"id": ["Duplicate ID."]}}}},
+                status=400,
+            )
+        changes[transaction_id] = form.changed_fields()
+
+    try:
+        result = user.apply_batch(
+            create=[
+                {
+                    "transaction_type": form.cleaned_data["type"],
+                    "amount": form.cleaned_data["amount"],
+                    "currency": form.cleaned_data["currency"],
+                    "name": form.cleaned_data["title"],
+                    "transaction_date": form.cleaned_data["date"],
+                    "tags": form.cleaned_data["spending_type"],
+                    "notes": form.cleaned_data["notes"],
+                }
+                for _, form in create_forms
+            ],
+            update=changes,
+            delete=delete,
+        )
+    except models.Transaction.DoesNotExist as e:
+        return http.JsonResponse({"errors": {"update": [str(e)]}}, status=404)
+
+    return http.JsonResponse(result._asdict())
+
+
+@require_GET
+@auth.authenticated()
+def export_transactions(
+    request: http.HttpRequest, user: auth.User
+) -> http.HttpResponse:
+    """
+    Streams the user's transactions as a CSV file download.
+
+    Query parameters (all optional):
+        start, end -> ISO 8601 dates; exports transactions on or after `start` and before `end`.
+        gzip -> If set, the file is gzip-compressed on the fly.
+    """
+    try:
+        transactions = user.filter_transactions(
+            start=auth.parse_date(request.GET.get("start")),
+            end=auth.parse_date(request.GET.get("end")),
+        )
+    except ValueError:
+        return http.HttpResponseBadRequest("Invalid date.")
+
+    content = exports.iter_csv(transactions, user.currency)
+    filename = "transactions.csv"
+    content_type = "text/csv"
+    if request.GET.get("gzip"):
+        content = exports.gzip_stream(content)
+        filename += ".gz"
+        content_type = "application/gzip"
+
+    response = http.StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 @auth.authenticated()
 def delete_transaction(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
     """
     Deletes a transaction with the given transaction ID.
     """
+    return remove_transaction(request, user)
+
+
+def remove_transaction(request: http.HttpRequest, user: auth.User) -> http.HttpResponse:
+    """
+    Deletes the transaction whose ID was submitted.
+    """
     id = int(request.POST["id"])
     user.delete_transaction(id)
     return redirect("dashboard")
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 from pathlib import Path
 
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "app.instrumentation.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -76,12 +78,39 @@ WSGI_APPLICATION = "pothos.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# SQLite by default, tuned for concurrent requests (see app.db.sqlite3); waiting for
+# the write lock is bounded by DB_TIMEOUT seconds.
+# Set DB_ENGINE=postgresql, and DB_NAME, DB_USER, DB_PASSWORD, DB_HOST and DB_PORT,
+# to use PostgreSQL (install the "postgresql" extra), with connections kept open for
+# DB_CONN_MAX_AGE seconds.
+
+DB_ENGINE = config("DB_ENGINE", default="sqlite")
+
+if DB_ENGINE == "postgresql":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("DB_NAME", default="pothos"),
+            "USER": config("DB_USER", default=""),
+            "PASSWORD": config("DB_PASSWORD", default=""),
+            "HOST": config("DB_HOST", default=""),
+            "PORT": config("DB_PORT", default=""),
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+        }
     }
-}
+elif DB_ENGINE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "app.db.sqlite3",
+            "NAME": config("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+            "OPTIONS": {"timeout": config("DB_TIMEOUT", default=20, cast=float)},
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unsupported DB_ENGINE {DB_ENGINE!r}")
+
+# Check that persistent connections still work at the start of each request.
+DB_CONN_HEALTH_CHECKS = config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool)
 
 
 # Password validation
@@ -127,6 +156,139 @@ STATIC_URL = "/static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
+# Sessions only hold the auth backend's session token (see app.auth), serialized as JSON.
+# Signed cookies keep the token in the browser; set SESSION_ENGINE to
+# "django.contrib.sessions.backends.cached_db" to keep it server side, so the cookie only
+# carries a short session key. (The plain "cache" engine would lose sessions between
+# workers, since the default cache is in-process.)
+SESSION_ENGINE = config(
+    "SESSION_ENGINE", default="django.contrib.sessions.backends.signed_cookies"
+)
+
+SESSION_SERIALIZER = "django.contrib.sessions.serializers.JSONSerializer"
+
+# Verified Firebase session cookie claims are cached so that not every request
+# makes a revocation check against Firebase.
+# Claims are cached for at most SESSION_CLAIMS_CACHE_TTL seconds; a revoked session
+# can therefore stay usable on other devices for that long.
+SESSION_CLAIMS_CACHE_TTL = config("SESSION_CLAIMS_CACHE_TTL", default=60, cast=int)
+
+SESSION_CLAIMS_CACHE_SIZE = config("SESSION_CLAIMS_CACHE_SIZE", default=4096, cast=int)
+
+# Name of an entry in CACHES to share verified claims between processes.
+# Leave empty to keep the cache in-process.
+SESSION_CLAIMS_CACHE_ALIAS = config("SESSION_CLAIMS_CACHE_ALIAS", default="")
+
+# Users' database rows are cached in-process by app.auth.User.retrieve.
+# The TTL bounds how long other processes can serve a stale row after a change.
+USER_CACHE_TTL = config("USER_CACHE_TTL", default=300, cast=int)
+
+USER_CACHE_SIZE = config("USER_CACHE_SIZE", default=4096, cast=int)
+
+# HTTP client used for the Firebase identity toolkit REST API (signing in).
+# Timeouts are in seconds; retries back off exponentially by IDENTITY_API_RETRY_BACKOFF.
+IDENTITY_API_CONNECT_TIMEOUT = config(
+    "IDENTITY_API_CONNECT_TIMEOUT", default=3.05, cast=float
+)
+
+IDENTITY_API_READ_TIMEOUT = config("IDENTITY_API_READ_TIMEOUT", default=10, cast=float)
+
+IDENTITY_API_RETRIES = config("IDENTITY_API_RETRIES", default=2, cast=int)
+
+IDENTITY_API_RETRY_BACKOFF = config(
+    "IDENTITY_API_RETRY_BACKOFF", default=0.3, cast=float
+)
+
+IDENTITY_API_POOL_SIZE = config("IDENTITY_API_POOL_SIZE", default=10, cast=int)
+
+# Maximum number of transactions of each type shown on one dashboard page.
+TRANSACTIONS_PAGE_SIZE = config("TRANSACTIONS_PAGE_SIZE", default=50, cast=int)
+
+# JSON API (app.api) page sizes, and the number of rows fetched from the database
+# at a time while streaming a page.
+API_PAGE_SIZE = config("API_PAGE_SIZE", default=100, cast=int)
+
+API_MAX_PAGE_SIZE = config("API_MAX_PAGE_SIZE", default=10000, cast=int)
+
+API_ITERATOR_CHUNK_SIZE = config("API_ITERATOR_CHUNK_SIZE", default=500, cast=int)
+
+# Number of rows inserted per bulk_create batch when importing transactions.
+IMPORT_BATCH_SIZE = config("IMPORT_BATCH_SIZE", default=500, cast=int)
+
+# Maximum number of creates, updates and deletes in one batch request (transaction/batch).
+BATCH_MAX_OPERATIONS = config("BATCH_MAX_OPERATIONS", default=1000, cast=int)
+
+# Number of rows fetched from the database at a time while exporting transactions.
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", default=2000, cast=int)
+
+# Size of the thread pool async views use for blocking Firebase calls.
+# It bounds how many identity calls one process keeps in flight at once.
+FIREBASE_IO_THREADS = config("FIREBASE_IO_THREADS", default=32, cast=int)
+
+# Serve the async versions of the views (app.async_views); use with pothos.asgi.
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
+# Fraction (0 to 1) of requests whose Firebase, user lookup, database and rendering
+# times are measured, sent back in a Server-Timing header and logged as JSON lines
+# by the "app.instrumentation" logger.
+SERVER_TIMING_SAMPLE_RATE = config("SERVER_TIMING_SAMPLE_RATE", default=0.0, cast=float)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "app.instrumentation": {
+            "handlers": ["console"],
+            "level": "INFO",
+        },
+    },
+}
+
+# Backend used to authenticate users and verify their sessions (see app.backends):
+# "app.backends.firebase.FirebaseBackend", or "app.backends.local.LocalBackend"
+# to keep accounts in our database and verify sessions without any network calls.
+AUTH_BACKEND = config("AUTH_BACKEND", default="app.backends.firebase.FirebaseBackend")
+
+# Path of the Firebase service account key used by the Firebase auth backend.
+# It is only read when the backend first talks to Firebase.
+FIREBASE_CREDENTIALS = config(
+    "FIREBASE_CREDENTIALS", default=str(BASE_DIR / "firebase-credentials.json")
+)
+
+# Rendered dashboard fragments are cached under the user's data version (app.versions),
+# in the "fragments" cache: in-process memory by default, or set FRAGMENT_CACHE_BACKEND
+# to e.g. "django.core.cache.backends.filebased.FileBasedCache" with a directory as
+# FRAGMENT_CACHE_LOCATION to share them between processes.
+FRAGMENT_CACHE_TTL = config("FRAGMENT_CACHE_TTL", default=3600, cast=int)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "fragments": {
+        "BACKEND": config(
+            "FRAGMENT_CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("FRAGMENT_CACHE_LOCATION", default="pothos-fragments"),
+        "OPTIONS": {
+            "MAX_ENTRIES": config("FRAGMENT_CACHE_SIZE", default=1000, cast=int)
+        },
+    },
+}
+
+# Number of months averaged by the rolling averages of the Analysis tab (app.analytics).
+ANALYTICS_ROLLING_WINDOW = config("ANALYTICS_ROLLING_WINDOW", default=3, cast=int)
+
+# Number of recurring transaction rules materialized per database transaction
+# by the materialize_recurring command (app.recurring).
+RECURRING_BATCH_SIZE = config("RECURRING_BATCH_SIZE", default=500, cast=int)
 
-SESSION_SERIALIZER = "django.contrib.sessions.serializers.PickleSerializer"
+# Exchange rates (app.exchange) are loaded into the database from this JSON file by the
+# load_exchange_rates command, and cached in every process for EXCHANGE_RATES_CACHE_TTL
+# seconds.
+EXCHANGE_RATES_FILE = config(
+    "EXCHANGE_RATES_FILE", default=str(BASE_DIR / "exchange-rates.json")
+)
+EXCHANGE_RATES_CACHE_TTL = config("EXCHANGE_RATES_CACHE_TTL", default=300, cast=int)